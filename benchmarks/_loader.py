@@ -0,0 +1,31 @@
+"""
+Import the integration modules without a Home Assistant installation.
+
+When ``homeassistant`` is importable the real package is used. Otherwise the
+package directory is registered under a stub package so that the HA free
+modules (``duolingo``, ``tracing``, ...) can be imported without running the
+integration's ``__init__``.
+"""
+import importlib, importlib.util, os, sys, types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(ROOT, "custom_components", "duolingo")
+STUB_PACKAGE = "_duolingo_bench"
+
+
+def has_homeassistant() -> bool:
+    return importlib.util.find_spec("homeassistant") is not None
+
+
+def load(module: str):
+    """Import ``custom_components.duolingo.<module>``."""
+    if has_homeassistant():
+        if ROOT not in sys.path:
+            sys.path.insert(0, ROOT)
+        return importlib.import_module(f"custom_components.duolingo.{module}")
+
+    if STUB_PACKAGE not in sys.modules:
+        package = types.ModuleType(STUB_PACKAGE)
+        package.__path__ = [PACKAGE_DIR]
+        sys.modules[STUB_PACKAGE] = package
+    return importlib.import_module(f"{STUB_PACKAGE}.{module}")
@@ -0,0 +1,171 @@
+"""
+End-to-end benchmark of the Duolingo client against a local fake server.
+
+    python benchmarks/bench_e2e.py --users 5 --friends 1000 --rounds 10 --output after.json --compare before.json
+
+Measures client setup, every ``Duolingo.update`` and the full coordinator cycle
+(all tracked users updated one after another, as ``DuolingoDataCoordinator``
+does), the number of requests per endpoint, the bytes served and the peak
+traced memory. The JSON report can be compared with one produced on another
+commit.
+"""
+import argparse, json, os, platform, statistics, subprocess, sys, time, tracemalloc
+from dataclasses import asdict, fields
+from typing import Any, Callable
+from unittest.mock import patch
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _loader import ROOT, load
+from fake_server import FakeDuolingo, FakeDuolingoServer, stub_session_class
+from payloads import BenchConfig, SyntheticAccounts
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+        "max": ordered[-1],
+    }
+
+
+def _commit() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def _cycles(clients: list, rounds: int, requests_counter, reset: Callable, served: Callable | None = None, cohorts=None) -> dict[str, list]:
+    measured = {"cycles": [], "updates": [], "peaks": [], "requests": [], "bytes": []}
+    for _ in range(rounds):
+        reset()
+        if cohorts is not None:
+            cohorts.start_cycle()
+        tracemalloc.start()
+        cycle_started = time.perf_counter()
+        for client in clients:
+            update_started = time.perf_counter()
+            client.update(force=True)
+            measured["updates"].append(time.perf_counter() - update_started)
+        measured["cycles"].append(time.perf_counter() - cycle_started)
+        measured["peaks"].append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+        measured["requests"].append(dict(requests_counter))
+        if served is not None:
+            measured["bytes"].append(served())
+    return measured
+
+
+def run_cassette(path: str, rounds: int, original_timing: bool) -> dict[str, Any]:
+    """Replay a cassette recorded with ``record_cassette.py`` instead of using the fake server."""
+    cassette_module, duolingo_api, duolingo = load("cassette"), load("duolingo_api"), load("duolingo")
+    cassette = cassette_module.Cassette(path, cassette_module.Cassette.REPLAY if original_timing else cassette_module.Cassette.REPLAY_FAST)
+
+    cohorts = duolingo.CohortRegistry()
+    started = time.perf_counter()
+    clients = [duolingo_api.DuolingoAPI(username, "replay-jwt", cassette=cassette, cohorts=cohorts) for username in cassette.meta.get("usernames", [])]
+    setup = time.perf_counter() - started
+    setup_requests = sum(cassette.requests.values())
+
+    measured = _cycles(clients, rounds, cassette.requests, cassette.requests.clear, cohorts=cohorts)
+    return _metrics(measured, len(clients), setup, setup_requests)
+
+
+def run(config: BenchConfig, rounds: int) -> dict[str, Any]:
+    duolingo_api, duolingo = load("duolingo_api"), load("duolingo")
+    cohorts = duolingo.CohortRegistry()
+    accounts = SyntheticAccounts(config)
+    fake = FakeDuolingo(accounts, config.latency_ms)
+
+    with FakeDuolingoServer(fake) as server, patch.object(requests, "Session", stub_session_class(server.base_url)):
+        started = time.perf_counter()
+        clients = [duolingo_api.DuolingoAPI(username, "bench-jwt", cohorts=cohorts) for username in accounts.usernames]
+        setup = time.perf_counter() - started
+        setup_requests = sum(fake.requests.values())
+
+        measured = _cycles(clients, rounds, fake.requests, fake.reset, lambda: fake.bytes, cohorts)
+
+    return _metrics(measured, len(clients), setup, setup_requests)
+
+
+def _metrics(measured: dict[str, list], users: int, setup: float, setup_requests: int) -> dict[str, Any]:
+    cycles, updates, requests_per_cycle = measured["cycles"], measured["updates"], measured["requests"]
+    cold, warm = cycles[0], cycles[1:] or cycles
+    metrics = {
+        "setup_s": setup,
+        "setup_requests": setup_requests,
+        "cold_cycle_s": cold,
+        "cycle_s": _summary(warm),
+        "update_s": _summary(updates[users:] or updates),
+        "cold_requests": sum(requests_per_cycle[0].values()),
+        "requests_per_cycle": sum(requests_per_cycle[-1].values()),
+        "requests_by_endpoint": requests_per_cycle[-1],
+        "peak_memory_kib": _summary(measured["peaks"]),
+    }
+    if measured["bytes"]:
+        metrics["bytes_per_cycle"] = measured["bytes"][-1]
+    return metrics
+
+
+def _flatten(data: dict, prefix: str = "") -> dict[str, float]:
+    out = {}
+    for key, value in data.items():
+        if isinstance(value, dict):
+            out.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[f"{prefix}{key}"] = value
+    return out
+
+
+def compare(before: dict, after: dict) -> str:
+    old, new = _flatten(before["metrics"]), _flatten(after["metrics"])
+    lines = [f"{'metric':40} {before['meta'].get('commit') or '?':>12} {after['meta'].get('commit') or '?':>12} {'change':>9}"]
+    for key in sorted(old.keys() | new.keys()):
+        a, b = old.get(key), new.get(key)
+        change = f"{(b - a) / a * 100:+8.1f}%" if a and b is not None else ""
+        lines.append(f"{key:40} {'' if a is None else f'{a:12.4g}'} {'' if b is None else f'{b:12.4g}'} {change:>9}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    for field in fields(BenchConfig):
+        parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(field.default), default=field.default)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--cassette", help="Replay this cassette instead of starting the fake server")
+    parser.add_argument("--original-timing", action="store_true", help="Replay the cassette with the recorded response times")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Compare with a previous JSON report")
+    args = parser.parse_args()
+
+    config = BenchConfig(**{field.name: getattr(args, field.name) for field in fields(BenchConfig)})
+    report = {
+        "meta": {
+            **_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "rounds": args.rounds,
+            "config": {"cassette": os.path.basename(args.cassette), "original_timing": args.original_timing} if args.cassette else asdict(config),
+        },
+        "metrics": run_cassette(args.cassette, max(args.rounds, 1), args.original_timing) if args.cassette else run(config, max(args.rounds, 1)),
+    }
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as previous:
+            print(compare(json.load(previous), report))
+
+
+if __name__ == "__main__":
+    main()
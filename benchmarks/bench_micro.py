@@ -0,0 +1,232 @@
+"""
+Micro-benchmarks of the CPU bound data shaping that runs on every refresh.
+
+    python benchmarks/bench_micro.py --sizes 10 100 1000 --output after.json --compare before.json
+
+Every case runs over synthetic payloads of each size (friends, cohort rows,
+friend streaks, xp days, nested keys, tracked users). Next to the time per call
+the report contains ``growth``, the largest log-log slope between two
+consecutive sizes: ~1 is linear, ~2 is quadratic. Cases that need Home
+Assistant (``convert_objects``, the sensors) are skipped when it is not
+installed.
+"""
+import argparse, json, math, os, platform, sys, time, timeit
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _loader import has_homeassistant, load
+from bench_e2e import _commit, compare
+from payloads import BenchConfig, SyntheticAccounts
+
+JWT = "bench-jwt"
+
+
+def offline_client(duolingo, accounts: SyntheticAccounts, username: str):
+    """A ``Duolingo`` object filled with synthetic data, without any request."""
+    user_id = accounts.ids[username]
+    client = duolingo.Duolingo.__new__(duolingo.Duolingo)
+    duolingo.Base.__init__(client, username, jwt=JWT)
+
+    client.user_data = duolingo.DuolingoUserData(username, jwt=JWT, user_id=user_id)
+    by_id, xp_summaries = accounts.user_by_id(user_id), accounts.xp_summaries(user_id)
+    client.user_data._data = {
+        "by_username": duolingo.DuolingoUserData._profile(by_id, xp_summaries),
+        "by_id": {**by_id, "xp_summaries": xp_summaries},
+    }
+    client.user_id = user_id
+    client._logged_in = True
+    client.cohorts = None
+    client._clients = {}
+    client.leaderboard_data._data = accounts.leaderboard(user_id)
+    client.friends_data._data = accounts.friends_profile(user_id)
+    matches = accounts.friend_streak_matches(user_id)
+    client.friend_streaks_data._data = {
+        "friend_streak": matches,
+        "matches": accounts.friend_streak_details([match["matchId"] for match in matches["friendsStreak"]["confirmedMatches"]]),
+    }
+    client.quest_data._data = {"progress": accounts.quests_progress(user_id), "schema": accounts.quests_schema()}
+    return client
+
+
+def _nested(n: int) -> dict:
+    return {f"key{i}": {"inner": {"a": i, "b": str(i)}, "value": i, "list": [i]} for i in range(n)}
+
+
+def _accounts(**kwargs) -> SyntheticAccounts:
+    return SyntheticAccounts(BenchConfig(**{"users": 1, "courses": 1, "friends": 1, "friend_streaks": 1, "cohort_size": 1, "xp_days": 1, **kwargs}))
+
+
+def case_data_object(n):
+    DataObject = load("duolingo_api").DataObject
+    data = _nested(n)
+    return lambda: DataObject(data)
+
+
+def case_data_object_get(n):
+    obj = load("duolingo_api").DataObject(_nested(n))
+    return lambda: obj.get(f"key{n // 2}")
+
+
+def case_convert_objects(n):
+    convert_objects = load("helpers").convert_objects
+    data = _nested(n)
+    return lambda: convert_objects(data)
+
+
+def case_lessons_on(n):
+    accounts = _accounts(xp_days=n)
+    user_data = offline_client(load("duolingo"), accounts, accounts.usernames[0]).user_data
+    midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return lambda: user_data.lessons_on(midnight)
+
+
+def case_xp_week(n):
+    accounts = _accounts(xp_days=n)
+    user_data = offline_client(load("duolingo"), accounts, accounts.usernames[0]).user_data
+    return lambda: user_data.xp_week
+
+
+def case_cohort_rankings(n):
+    """Parsing a cohort, done once per fetched cohort and shared by its tracked members."""
+    accounts = _accounts(cohort_size=n)
+    duolingo = load("duolingo")
+    cohort = offline_client(duolingo, accounts, accounts.usernames[0]).leaderboard_data._data["active"]["cohort"]
+    return lambda: duolingo.CohortRankings(cohort)
+
+
+def case_xp_history(n):
+    """The XP history sensors over n days of history, expected to stay flat."""
+    accounts = _accounts(xp_days=n)
+    history = load("history").UserXpHistory(max(n, 30) + 1)
+    history.record(offline_client(load("duolingo"), accounts, accounts.usernames[0]).user_data)
+    return lambda: (history.total_30_days, history.month_to_date, history.average_7_days, history.best_day)
+
+
+def case_friend_streaks_confirmed(n):
+    accounts = _accounts(friend_streaks=n)
+    friend_streaks = offline_client(load("duolingo"), accounts, accounts.usernames[0]).friend_streaks_data
+    # The property only builds the records once per update, time the build itself
+    return lambda: friend_streaks._streak_records(friend_streaks._data)
+
+
+def case_friends_following(n):
+    accounts = _accounts(friends=n)
+    duolingo = load("duolingo")
+    users = offline_client(duolingo, accounts, accounts.usernames[0]).friends_data._data["following"]["users"]
+    return lambda: duolingo.friend_records(users)
+
+
+def case_sensor_descriptions(n):
+    """State and attributes of every sensor of one user, courses and friend streaks scale with n / 10."""
+    sensor, entity = load("sensor"), load("entity")
+    accounts = _accounts(friends=n, cohort_size=n, xp_days=n, courses=max(n // 10, 1), friend_streaks=max(n // 10, 1))
+    username = accounts.usernames[0]
+    coordinator = SimpleNamespace(data={username: offline_client(load("duolingo"), accounts, username)}, restored_at=None)
+    sensors = []
+    for description in sensor.SENSORS:
+        if type(description) == sensor.functionType:
+            sensors.extend(entity.DuolingoSensor(coordinator, JWT, username, generated) for generated in description(coordinator.data[username]))
+        else:
+            sensors.append(entity.DuolingoSensor(coordinator, JWT, username, description))
+
+    def run():
+        for item in sensors:
+            item.update_state()
+            item.update_attributes()
+    return run
+
+
+def case_leaderboard_sensor(n):
+    """``DuolingoLeaderboardSensor.update`` over n tracked users."""
+    sensor, entity = load("sensor"), load("entity")
+    accounts = _accounts(users=n)
+    duolingo = load("duolingo")
+    coordinator = SimpleNamespace(data={username: offline_client(duolingo, accounts, username) for username in accounts.usernames}, restored_at=None)
+    description = entity.DuolingoEntityDescription(
+        key="user_data",
+        name="Week",
+        state=lambda x: x.get("week_xp") if x.get("week_xp", -1) > 0 else 0,
+        unit="place",
+    )
+    leaderboard = entity.DuolingoLeaderboardSensor(coordinator, JWT, accounts.usernames, description)
+    return leaderboard.update
+
+
+CASES: dict[str, tuple[Callable, bool]] = {
+    "DataObject": (case_data_object, False),
+    "DataObject.get": (case_data_object_get, False),
+    "convert_objects": (case_convert_objects, True),
+    "lessons_on": (case_lessons_on, False),
+    "xp_week": (case_xp_week, False),
+    "CohortRankings": (case_cohort_rankings, False),
+    "UserXpHistory": (case_xp_history, False),
+    "DuolingoFriendStreaksData.confirmed": (case_friend_streaks_confirmed, False),
+    "DuolingoFriendsData.following": (case_friends_following, False),
+    "sensor_descriptions": (case_sensor_descriptions, True),
+    "DuolingoLeaderboardSensor.update": (case_leaderboard_sensor, True),
+}
+
+
+def measure(func: Callable, repeat: int = 3) -> float:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def growth(timings: dict[int, float]) -> float | None:
+    sizes = sorted(timings)
+    slopes = [
+        math.log(timings[b] / timings[a]) / math.log(b / a)
+        for a, b in zip(sizes, sizes[1:])
+        if timings[a] > 0 and timings[b] > 0
+    ]
+    return round(max(slopes), 3) if slopes else None
+
+
+def run(sizes: list[int], selected: list[str] | None = None) -> dict[str, Any]:
+    results = {}
+    for name, (build, needs_homeassistant) in CASES.items():
+        if selected and name not in selected:
+            continue
+        if needs_homeassistant and not has_homeassistant():
+            print(f"skipping {name}: homeassistant is not installed", file=sys.stderr)
+            continue
+        timings = {n: measure(build(n)) for n in sizes}
+        results[name] = {**{f"n{n}_s": seconds for n, seconds in timings.items()}, "growth": growth(timings)}
+        print(f"{name:40} " + " ".join(f"n={n}: {seconds * 1e6:10.1f} us" for n, seconds in timings.items()) + f"  growth {results[name]['growth']}", file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--case", action="append", choices=list(CASES), help="Only run this case (repeatable)")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Compare with a previous JSON report")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            **_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "sizes": args.sizes,
+        },
+        "metrics": run(sorted(args.sizes), args.case),
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as previous:
+            print(compare(json.load(previous), report))
+    elif not args.output:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Local HTTP stub serving every Duolingo endpoint used by ``duolingo.py``.
+
+Requests are routed to the stub by ``StubSession``, which rewrites
+``https://<host>/<path>`` to ``http://127.0.0.1:<port>/<host>/<path>``.
+"""
+import json, re, threading, time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from payloads import SyntheticAccounts
+
+LEADERBOARD_HOST = "duolingo-leaderboards-prod.duolingo.com"
+
+
+def _project(document: dict, fields: str | None) -> dict:
+    """Apply the top level of a ``?fields=a,b{c}`` projection."""
+    if not fields:
+        return document
+    names, depth, current = [], 0, ""
+    for char in fields:
+        if char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            names.append(current)
+            current = ""
+        elif depth == 0:
+            current += char
+    names.append(current)
+    return {name: document[name] for name in names if name in document}
+
+
+class FakeDuolingo:
+    """Routes stub requests to ``SyntheticAccounts`` and keeps request statistics."""
+
+    def __init__(self, accounts: SyntheticAccounts, latency_ms: float = 0.0):
+        self.accounts = accounts
+        self.latency = latency_ms / 1000
+        self.requests = Counter()
+        self.bytes = 0
+        self._lock = threading.Lock()
+        self.routes = [
+            ("GET", r"www\.duolingo\.com/2023-05-23/friends/users/(\d+)/matches", "friend_streaks", lambda m, q: accounts.friend_streak_matches(int(m[1]))),
+            ("GET", r"www\.duolingo\.com/2023-05-23/friends/users", "user_search", lambda m, q: accounts.friends_users(q["username"])),
+            ("GET", r"www\.duolingo\.com/2023-05-23/users/(\d+)/xp_summaries", "xp_summaries", lambda m, q: accounts.xp_summaries(int(m[1]), q.get("startDate"), q.get("endDate"))),
+            ("GET", r"www\.duolingo\.com/2023-05-23/users/(\d+)", "user_by_id", lambda m, q: _project(accounts.user_by_id(int(m[1])), q.get("fields"))),
+            ("PATCH", r"www\.duolingo\.com/2023-05-23/users/(\d+)", "switch_language", lambda m, q: accounts.score_patch(int(m[1]))),
+            ("GET", r"www\.duolingo\.com/friends-streak/matches", "friend_streak_details", lambda m, q: accounts.friend_streak_details(q.get("matchIds", "").split(","))),
+            ("GET", r"(?:www\.)?duolingo\.com/users/([^/]+)", "legacy_user", lambda m, q: accounts.legacy_user(m[1])),
+            ("GET", LEADERBOARD_HOST.replace(".", r"\.") + r"/leaderboards/[^/]+/users/(\d+)", "leaderboard", lambda m, q: accounts.leaderboard(int(m[1]))),
+            ("GET", r"friends-prod\.duolingo\.com/users/(\d+)/profile", "friends", lambda m, q: accounts.friends_profile(int(m[1]), int(q.get("pageSize", 1000)))),
+            ("GET", r"goals-api\.duolingo\.com/users/(\d+)/progress", "quests_progress", lambda m, q: accounts.quests_progress(int(m[1]))),
+            ("GET", r"goals-api\.duolingo\.com/schema", "quests_schema", lambda m, q: accounts.quests_schema()),
+        ]
+
+    def handle(self, method: str, path: str, query: str) -> tuple[int, bytes]:
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        for route_method, pattern, name, build in self.routes:
+            if route_method != method:
+                continue
+            match = re.fullmatch(pattern, path.lstrip("/"))
+            if match is None:
+                continue
+            if self.latency:
+                time.sleep(self.latency)
+            body = json.dumps(build(match, params)).encode()
+            with self._lock:
+                self.requests[name] += 1
+                self.bytes += len(body)
+            return 200, body
+        with self._lock:
+            self.requests["unknown"] += 1
+        return 404, b'{"error": "not found"}'
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.bytes = 0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeDuolingo/1.0"
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        url = urlsplit(self.path)
+        status, body = self.server.fake.handle(self.command, url.path, url.query)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeDuolingoServer:
+    def __init__(self, fake: FakeDuolingo):
+        self.fake = fake
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = fake
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def stub_session_class(base_url: str) -> type[requests.Session]:
+    """A ``requests.Session`` that sends every request to the stub server."""
+
+    class StubSession(requests.Session):
+        def send(self, request, **kwargs):
+            url = urlsplit(request.url)
+            request.url = f"{base_url}/{url.netloc}{url.path}{'?' + url.query if url.query else ''}"
+            return super().send(request, **kwargs)
+
+    return StubSession
@@ -0,0 +1,240 @@
+"""
+Deterministic synthetic payloads shaped like the Duolingo endpoints used by ``duolingo.py``.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+LANGUAGES = ["es", "fr", "de", "it", "ja", "ko", "pt", "ru", "zh", "nl", "sv", "pl", "tr", "el", "he"]
+AVATAR = "//simg-ssl.duolingo.com/ssr-avatars/{}/SSR-abcdefghij"
+
+
+@dataclass
+class BenchConfig:
+    users: int = 3
+    courses: int = 4
+    friends: int = 200
+    friend_streaks: int = 5
+    cohort_size: int = 30
+    xp_days: int = 35
+    latency_ms: float = 0.0
+    seed: int = 1
+
+
+class SyntheticAccounts:
+    """Builds every payload for ``config.users`` tracked accounts. All tracked users share one cohort."""
+
+    def __init__(self, config: BenchConfig):
+        self.config = config
+        self.usernames = [f"bench_user_{i}" for i in range(config.users)]
+        self.ids = {username: 100000 + i for i, username in enumerate(self.usernames)}
+        self.cohort = self._cohort()
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(":".join(str(part) for part in (self.config.seed, *key)))
+
+    def username_for(self, user_id: int) -> str | None:
+        for username, uid in self.ids.items():
+            if uid == user_id:
+                return username
+        return None
+
+    def friends_users(self, username: str) -> dict:
+        if username not in self.ids:
+            return {"users": []}
+        return {"users": [{"username": username, "id": self.ids[username]}]}
+
+    def _courses(self, user_id: int) -> list[dict]:
+        rng = self._rng("courses", user_id)
+        courses = []
+        for i in range(self.config.courses):
+            learning = LANGUAGES[i % len(LANGUAGES)]
+            courses.append({
+                "title": f"Language {learning.upper()}",
+                "learningLanguage": learning,
+                "fromLanguage": "en",
+                "xp": rng.randint(100, 100000),
+                "id": f"DUOLINGO_{learning.upper()}_EN{i // len(LANGUAGES) or ''}",
+                "crowns": rng.randint(0, 500),
+                "healthEnabled": True,
+                "preload": False,
+                "placementTestAvailable": False,
+                "authorId": "duolingo",
+            })
+        return courses
+
+    def legacy_user(self, username: str) -> dict:
+        user_id = self.ids[username]
+        courses = self._courses(user_id)
+        rng = self._rng("legacy", user_id)
+        return {
+            "id": user_id,
+            "username": username,
+            "fullname": f"Bench {username}",
+            "avatar": AVATAR.format(user_id),
+            "daily_goal": 50,
+            "streak_extended_today": rng.random() > 0.5,
+            "learning_language_string": courses[0]["title"] if courses else "?",
+            "languages": [
+                {
+                    "language": course["learningLanguage"],
+                    "points": course["xp"],
+                    "skills": [
+                        {"name": f"Skill {s}", "id": f"{user_id}{s:04d}", "words": [f"word{w}" for w in range(10)], "strength": rng.random()}
+                        for s in range(40)
+                    ],
+                }
+                for course in courses
+            ],
+            "calendar": [{"datetime": 1700000000000 + i * 86400000, "improvement": rng.randint(0, 100)} for i in range(200)],
+        }
+
+    def user_by_id(self, user_id: int) -> dict:
+        courses = self._courses(user_id)
+        rng = self._rng("user", user_id)
+        today = datetime.now().strftime("%Y-%m-%d")
+        return {
+            "id": user_id,
+            "username": self.username_for(user_id),
+            "name": f"Bench {self.username_for(user_id)}",
+            "picture": AVATAR.format(user_id),
+            "totalXp": sum(course["xp"] for course in courses),
+            "gems": rng.randint(0, 5000),
+            "xpGoal": 50,
+            "currentCourseId": courses[0]["id"] if courses else None,
+            "learningLanguage": courses[0]["learningLanguage"] if courses else None,
+            "fromLanguage": "en",
+            "courses": courses,
+            "streak": 120,
+            "streakData": {
+                "currentStreak": {"startDate": "2024-01-01", "endDate": today, "lastExtendedDate": today, "length": 120},
+                "longestStreak": {"startDate": "2023-01-01", "endDate": "2023-12-31", "achieveDate": "2023-12-31", "length": 365},
+                "previousStreak": {"startDate": "2022-01-01", "endDate": "2022-02-01", "length": 31},
+            },
+        }
+
+    def score_patch(self, user_id: int) -> dict:
+        return {"currentCourse": {"scoreMetadata": {"reachedScore": self._rng("score", user_id).randint(0, 130)}}}
+
+    def xp_summaries(self, user_id: int, start: str | None = None, end: str | None = None) -> dict:
+        rng = self._rng("xp", user_id)
+        midnight = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        summaries = []
+        for day in range(self.config.xp_days):
+            date = midnight - timedelta(days=day)
+            summaries.append({
+                "date": int(date.timestamp()),
+                "gainedXp": rng.randint(0, 300),
+                "frozen": False,
+                "streakExtended": True,
+                "numSessions": rng.randint(0, 10),
+                "totalSessionTime": rng.randint(0, 3600),
+            })
+        if start is not None:
+            summaries = [s for s in summaries if datetime.fromtimestamp(s["date"]).strftime("%Y-%m-%d") >= start]
+        if end is not None:
+            summaries = [s for s in summaries if datetime.fromtimestamp(s["date"]).strftime("%Y-%m-%d") <= end]
+        return {"summaries": summaries}
+
+    def _cohort(self) -> dict:
+        rng = self._rng("cohort")
+        rankings = [
+            {
+                "avatar_url": AVATAR.format(900000 + i),
+                "display_name": f"Learner {i}",
+                "has_plus": rng.random() > 0.7,
+                "score": rng.randint(0, 3000),
+                "streak_extended_today": rng.random() > 0.5,
+                "user_id": 900000 + i,
+                "reaction": "NONE",
+            }
+            for i in range(max(self.config.cohort_size - len(self.usernames), 0))
+        ]
+        for username, user_id in self.ids.items():
+            rankings.append({
+                "avatar_url": AVATAR.format(user_id),
+                "display_name": username,
+                "has_plus": False,
+                "score": rng.randint(0, 3000),
+                "streak_extended_today": True,
+                "user_id": user_id,
+                "reaction": "NONE",
+            })
+        rankings.sort(key=lambda row: -row["score"])
+        return {"cohort_id": "bench-cohort", "rankings": rankings}
+
+    def leaderboard(self, user_id: int) -> dict:
+        now = datetime.now(timezone.utc)
+        return {
+            "tier": 5,
+            "streak_in_tier": 2,
+            "active": {
+                "contest": {
+                    "contest_start": (now - timedelta(days=3)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "contest_end": (now + timedelta(days=4)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                },
+                "cohort": self.cohort,
+            },
+        }
+
+    def _friend(self, rng: random.Random, i: int) -> dict:
+        return {
+            "username": f"friend_{i}",
+            "displayName": f"Friend {i}",
+            "picture": f"https:{AVATAR.format(800000 + i)}",
+            "hasSubscription": rng.random() > 0.8,
+            "totalXp": rng.randint(0, 500000),
+            "userId": 800000 + i,
+            "isFollowing": True,
+            "isFollowedBy": True,
+        }
+
+    def friends_profile(self, user_id: int, page_size: int = 1000) -> dict:
+        rng = self._rng("friends", user_id)
+        users = [self._friend(rng, i) for i in range(min(self.config.friends, page_size))]
+        return {"followers": {"users": users, "totalUsers": len(users)}, "following": {"users": users, "totalUsers": len(users)}}
+
+    def quests_progress(self, user_id: int) -> dict:
+        return {
+            "goals": {
+                "details": {
+                    "2024_01_monthly_challenge": {"progress": 17, "progressIncrements": [1] * 17},
+                    "2024_01_03_friends_quest": {
+                        "progress": 40,
+                        "progressIncrements": [10, 10, 20],
+                        "socialProgress": [{"userId": 800001, "displayName": "Friend 1", "avatarUrl": AVATAR.format(800001), "progressIncrements": [15, 15]}],
+                    },
+                },
+            },
+        }
+
+    def quests_schema(self) -> dict:
+        return {"goals": [{"goalId": f"2024_{m:02d}_monthly_challenge", "threshold": 30} for m in range(1, 13)]}
+
+    def _match_id(self, user_id: int, i: int) -> str:
+        return f"match-{user_id}-{i}"
+
+    def friend_streak_matches(self, user_id: int) -> dict:
+        return {
+            "friendsStreak": {
+                "confirmedMatches": [
+                    {
+                        "matchId": self._match_id(user_id, i),
+                        "usersInMatch": [
+                            {"userId": user_id, "name": self.username_for(user_id), "picture": f"https:{AVATAR.format(user_id)}"},
+                            {"userId": 800000 + i, "name": f"Friend {i}", "picture": f"https:{AVATAR.format(800000 + i)}"},
+                        ],
+                    }
+                    for i in range(self.config.friend_streaks)
+                ],
+            },
+        }
+
+    def friend_streak_details(self, match_ids: list[str]) -> dict:
+        today = datetime.now().strftime("%Y-%m-%d")
+        return {
+            "friendsStreak": [
+                {"matchId": match_id, "streaks": [{"startDate": "2024-01-01", "endDate": today, "streakLength": 42, "extended": True}]}
+                for match_id in match_ids
+            ],
+        }
@@ -0,0 +1,39 @@
+"""
+Record a cassette of real Duolingo responses for offline replay.
+
+    python benchmarks/record_cassette.py --jwt "$DUOLINGO_JWT" --username alice --username bob --rounds 2 --output accounts.json.gz
+
+Tokens are never written and the fields listed in ``cassette.SCRUB_KEYS`` and
+``cassette.PERSONAL_KEYS`` (display names, avatars, bios) are replaced. The
+usernames of the recorded accounts and user ids stay, since the requests are
+matched on their URLs; every other username is replaced by an alias. Replay the cassette with ``bench_e2e.py --cassette accounts.json.gz``.
+"""
+import argparse, os, sys, time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from _loader import load
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jwt", required=True)
+    parser.add_argument("--username", action="append", required=True)
+    parser.add_argument("--rounds", type=int, default=1, help="Number of update cycles to record after the setup")
+    parser.add_argument("--output", required=True)
+    args = parser.parse_args()
+
+    cassette_module, duolingo_api = load("cassette"), load("duolingo_api")
+    cassette = cassette_module.Cassette(args.output, cassette_module.Cassette.RECORD, args.username)
+    cassette.meta = {"usernames": args.username, "rounds": args.rounds, "recorded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+    clients = [duolingo_api.DuolingoAPI(username, args.jwt, cassette=cassette) for username in args.username]
+    for _ in range(args.rounds):
+        for client in clients:
+            client.update(force=True)
+    cassette.save()
+    print(f"Recorded {sum(cassette.requests.values())} requests to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
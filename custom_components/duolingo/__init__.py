@@ -1,3 +1,5 @@
+from datetime import timedelta
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
@@ -5,8 +7,7 @@ from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.const import (
     CONF_USERNAME, 
     )
-from homeassistant.helpers.device_registry import DeviceEntry, async_get as async_get_device_registry
-from homeassistant.helpers.entity_registry import async_get as async_get_entity_registry
+from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.components.persistent_notification import (
     async_create as async_create_persistent_notification,
 )
@@ -16,10 +17,24 @@ from .const import (
     DOMAIN,
     CONF_JWT,
     CONF_INTERVAL,
+    CONF_DISABLED_CATEGORIES,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
     FORCE_SCRAPE,
+    HISTORY_DAYS,
+    SHARED_EXECUTOR_STOP,
     )
-from .coordinator import DuolingoDataCoordinator
-from .helpers import setup_client
+from .coordinator import DuolingoDataCoordinator, snapshot_store, history_store
+from .history import XpHistory
+from .scheduler import PollScheduler
+from .helpers import setup_client, get_shared_cache, get_shared_executor, get_shared_stagger
+from .registry import async_reconcile_entities
+from .services import async_setup_services, async_unload_services
+from .websocket_api import async_setup_websocket_api
+from .duolingo import CohortRegistry
 from .duolingo_api import (
     FailedToLogin
 )
@@ -29,46 +44,64 @@ PLATFORMS = [
     Platform.BUTTON,
 ]
 
-async def cleanup_existing_entities_and_devices(hass: HomeAssistant, config_entry: ConfigEntry):
-    entity_registry = async_get_entity_registry(hass)
-    device_registry = async_get_device_registry(hass)
-
-    for entity_id, entity in list(entity_registry.entities.items()):
-        if entity.config_entry_id == config_entry.entry_id:
-            entity_registry.async_remove(entity_id)
-
-    for device_id, device in list(device_registry.devices.items()):
-        if config_entry.entry_id in device.config_entries:
-            device_registry.async_remove_device(device_id)
-
-
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
+    store = snapshot_store(hass, config_entry.entry_id)
+    snapshot = await store.async_load() or {}
+    cohorts = CohortRegistry()
+    history_entry_store = history_store(hass, config_entry.entry_id)
+    history = XpHistory(HISTORY_DAYS, await history_entry_store.async_load())
+    executor = get_shared_executor(hass)
     try:
-        clients = await hass.async_add_executor_job(
+        clients = await executor.async_run(
+            hass,
             setup_client,
             config_entry.data[CONF_USERNAME],
             config_entry.data[CONF_JWT],
             config_entry.data.get(CONF_INTERVAL, 30),
+            snapshot.get("users"),
+            get_shared_cache(hass),
+            cohorts,
         )
     except FailedToLogin as err:
         raise ConfigEntryNotReady("Failed to Log-in") from err
-    coordinator = DuolingoDataCoordinator(hass, clients)
+    scheduler = None
+    if config_entry.data.get(CONF_ADAPTIVE_POLLING, False):
+        scheduler = PollScheduler(
+            timedelta(minutes=config_entry.data.get(CONF_INTERVAL, 30)),
+            timedelta(minutes=config_entry.data.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL)),
+            timedelta(minutes=config_entry.data.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL)),
+        )
+    coordinator = DuolingoDataCoordinator(hass, clients, config_entry.data.get(CONF_DISABLED_CATEGORIES, []), store, cohorts, history, history_entry_store, scheduler, executor, get_shared_stagger(hass), get_shared_cache(hass))
+    coordinator.async_restore(snapshot.get("saved_at"))
 
     hass.data.setdefault(DOMAIN, {})[config_entry.entry_id] = coordinator
 
+    async_setup_services(hass)
+    async_setup_websocket_api(hass)
+
     hass.async_create_task(finish_setup(hass, coordinator, config_entry))
 
     return True
 
 async def finish_setup(hass: HomeAssistant, coordinator: DuolingoDataCoordinator, config_entry: ConfigEntry):
-    await coordinator.async_config_entry_first_refresh()
+    # Entities restored from the snapshot come up at once, the network refresh follows in the background
+    restored = coordinator.restored_at is not None
+    if not restored:
+        await coordinator.async_config_entry_first_refresh()
 
-    async_dispatcher_connect(coordinator.hass, FORCE_SCRAPE.format(config_entry.entry_id), coordinator.async_refresh)
+    config_entry.async_on_unload(
+        async_dispatcher_connect(coordinator.hass, FORCE_SCRAPE.format(config_entry.entry_id), coordinator.async_force_refresh)
+    )
 
-    await cleanup_existing_entities_and_devices(hass, config_entry)
+    async_reconcile_entities(hass, coordinator, config_entry)
 
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
 
+    coordinator.async_start_planning()
+
+    if restored:
+        config_entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN} first refresh")
+
     config_entry.async_on_unload(config_entry.add_update_listener(update_listener))
 
 
@@ -77,11 +110,22 @@ async def async_unload_entry(hass: HomeAssistant, config_entry: ConfigEntry) ->
     if unload_ok := await hass.config_entries.async_unload_platforms(
         config_entry, PLATFORMS
     ):
-        del hass.data[DOMAIN][config_entry.entry_id]
-        if not hass.data[DOMAIN]:
+        coordinator: DuolingoDataCoordinator = hass.data[DOMAIN].pop(config_entry.entry_id)
+        await coordinator.async_shutdown()
+        if not any(isinstance(value, DuolingoDataCoordinator) for value in hass.data[DOMAIN].values()):
+            # Last entry gone: let running requests finish before the threads go away
+            if (unsub_stop := hass.data[DOMAIN].pop(SHARED_EXECUTOR_STOP, None)) is not None:
+                unsub_stop()
+            await hass.async_add_executor_job(get_shared_executor(hass).shutdown)
             del hass.data[DOMAIN]
+            async_unload_services(hass)
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Remove the snapshot and the XP history of a deleted config entry."""
+    await snapshot_store(hass, config_entry.entry_id).async_remove()
+    await history_store(hass, config_entry.entry_id).async_remove()
+
 async def update_listener(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
     """Handle options update."""
     await hass.config_entries.async_reload(config_entry.entry_id)
@@ -22,6 +22,10 @@ async def async_setup_entry(
     async_add_entities([DuolingoForceScan(coordinator, config_entry)], update_before_add=True)
 
 
+def button_unique_id(jwt: str) -> str:
+    return f'{jwt}_duolingo_force_scrape_button'
+
+
 class DuolingoForceScan(ButtonEntity):
     def __init__(self, coordinator: DuolingoDataCoordinator, config_entry: ConfigEntry):
         self._coordinator = coordinator
@@ -40,7 +44,7 @@ class DuolingoForceScan(ButtonEntity):
     @property
     def unique_id(self) -> str:
         """Return the unique id of the entity"""
-        return f'{self._jwt}_duolingo_force_scrape_button'
+        return button_unique_id(self._jwt)
     
     async def async_press(self) -> None:
         """Press the button"""
@@ -0,0 +1,123 @@
+import base64, hashlib, json, threading, time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable
+
+import requests
+
+from .cassette import Cassette, VOLATILE_PARAMS
+
+_local = threading.local()
+
+def token_subject(jwt: str | None) -> str:
+    """
+    User id the token was issued for, read from the ``sub`` claim without verifying it.
+    Tokens which can not be read get a scope of their own, derived from a hash and not the token itself.
+    """
+    if not jwt:
+        return "anonymous"
+    try:
+        payload = jwt.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return str(claims["sub"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return "token:" + hashlib.sha256(jwt.encode()).hexdigest()[:16]
+
+
+@contextmanager
+def bypass():
+    """
+    Send the GET requests made in this thread instead of answering them from the cache, e.g. for a refresh the user
+    asked for. Their responses still replace the cached ones. A request already in flight is waited for.
+    """
+    previous = getattr(_local, "bypass", False)
+    _local.bypass = True
+    try:
+        yield
+    finally:
+        _local.bypass = previous
+
+
+class _Entry:
+    __slots__ = ("done", "response", "error", "fetched_at")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: requests.Response | None = None
+        self.error: BaseException | None = None
+        self.fetched_at = 0.0
+
+
+class SharedCache:
+    """
+    Response cache shared by every config entry, keyed by the account the token was issued for and the endpoint.
+
+    A response is reused for ``ttl`` seconds. Concurrent requests for the same key wait for the one in flight
+    instead of sending their own. Only successful GET responses are kept.
+    """
+
+    def __init__(self, ttl: float = 120.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str], _Entry] = {}
+        self._subjects: dict[str, str] = {}
+        self.stats = Counter()
+
+    def key(self, jwt: str | None, url: str) -> tuple[str, str]:
+        # Unlike a replay, different date windows are different responses
+        endpoint = Cassette.key("GET", url, VOLATILE_PARAMS).split(" ", 1)[1]
+        # What a viewer gets depends on the privacy settings of the profile and whether the viewer follows it,
+        # so even another user's profile is only shared between tokens of the same account
+        subject = self._subjects.get(jwt)
+        if subject is None:
+            subject = self._subjects[jwt] = token_subject(jwt)
+        return subject, endpoint
+
+    def fetch(self, key: tuple[str, str], send: Callable[[], requests.Response]) -> tuple[requests.Response, bool]:
+        """Return the response for ``key`` and whether it came from the cache (or a request in flight)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry.done.is_set():
+                self.stats["collapsed"] += 1
+                owner = False
+            elif entry is not None and time.monotonic() - entry.fetched_at < self.ttl and not getattr(_local, "bypass", False):
+                self.stats["hits"] += 1
+                owner = False
+            else:
+                self._prune()
+                entry = self._entries[key] = _Entry()
+                self.stats["misses"] += 1
+                owner = True
+
+        if not owner:
+            entry.done.wait()
+            if entry.error is not None:
+                raise entry.error
+            return entry.response, True
+
+        try:
+            entry.response = send()
+        except BaseException as err:
+            entry.error = err
+            raise
+        finally:
+            entry.fetched_at = time.monotonic()
+            if entry.error is not None or entry.response.status_code != 200:
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+            entry.done.set()
+        return entry.response, False
+
+    def _prune(self):
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry.done.is_set() and now - entry.fetched_at >= self.ttl]:
+            del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries = {key: entry for key, entry in self._entries.items() if not entry.done.is_set()}
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "ttl": self.ttl, **self.stats}
@@ -0,0 +1,165 @@
+import gzip, json, re, threading, time
+from collections import Counter
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .tracing import endpoint_template
+
+# Query parameters which change on every request and are left out of the match key
+VOLATILE_PARAMS = frozenset({"_", "timezone"})
+# Date window of the XP summaries, which moves with the day of the replay. Left out of the match key as well,
+# requests differing only in the window are answered in the order they were recorded.
+DATE_PARAMS = frozenset({"startDate", "endDate"})
+# Response fields which are replaced before anything is written to disk
+SCRUB_KEYS = frozenset({
+    "email", "phoneNumber", "facebookId", "googleId", "appleId", "wechatId",
+    "jwt", "token", "accessToken", "refreshToken", "inviteURL", "trackingProperties",
+})
+# Profile fields of the recorded users and of everyone they see: display names, avatars, bios
+PERSONAL_KEYS = frozenset({
+    "name", "fullname", "displayName", "display_name", "bio", "location",
+    "picture", "avatar", "avatar_url", "avatarUrl",
+})
+# Replaced by aliases, except the usernames of the recorded accounts which the requests are matched on
+USERNAME_KEYS = frozenset({"username"})
+SCRUBBED = "redacted"
+JWT_RE = re.compile(r"eyJ[\w-]+\.[\w-]+\.[\w-]+")
+
+
+class CassetteError(Exception):
+    "Raised when a replayed request has no recorded response"
+    pass
+
+
+def _alias(aliases: dict[str, str], username: str) -> str:
+    key = username.lower()
+    if key not in aliases:
+        aliases[key] = f"user_{len(aliases) + 1}"
+    return aliases[key]
+
+
+def _scrub_item(key: str, item: Any, aliases: dict[str, str]) -> Any:
+    if item is None:
+        return None
+    if key in SCRUB_KEYS or key in PERSONAL_KEYS:
+        return SCRUBBED
+    if key in USERNAME_KEYS and isinstance(item, str):
+        return _alias(aliases, item)
+    return scrub(item, aliases)
+
+
+def scrub(value: Any, aliases: dict[str, str] | None = None) -> Any:
+    """
+    Replace secrets and personal fields. ``aliases`` maps lower case usernames to the ones written instead, the same
+    friend keeps the same alias across responses; usernames mapped to themselves are kept.
+    """
+    if aliases is None:
+        aliases = {}
+    if isinstance(value, dict):
+        return {key: _scrub_item(key, item, aliases) for key, item in value.items()}
+    if isinstance(value, list):
+        return [scrub(item, aliases) for item in value]
+    if isinstance(value, str):
+        return JWT_RE.sub(SCRUBBED, value)
+    return value
+
+
+class Cassette:
+    """
+    Transport for ``Base._make_req`` which records responses to a gzipped JSON file or replays them.
+
+    Modes:
+        ``record``: send the request and store the scrubbed response with its original duration
+        ``replay``: return the recorded responses, sleeping for their original duration
+        ``replay_fast``: return the recorded responses without any delay
+    """
+    RECORD = "record"
+    REPLAY = "replay"
+    REPLAY_FAST = "replay_fast"
+
+    def __init__(self, path: str, mode: str = REPLAY, usernames: list[str] | None = None):
+        if mode not in (self.RECORD, self.REPLAY, self.REPLAY_FAST):
+            raise ValueError(f"Unknown cassette mode {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._interactions: dict[str, list[dict]] = {}
+        self._cursor: dict[str, int] = {}
+        # Recorded accounts keep their usernames, every other username gets an alias
+        self._aliases: dict[str, str] = {username.lower(): username for username in usernames or []}
+        self.meta: dict[str, Any] = {}
+        self.requests = Counter()
+        if mode != self.RECORD:
+            self.load()
+
+    @staticmethod
+    def key(method: str, url: str, ignored: frozenset[str] = VOLATILE_PARAMS | DATE_PARAMS) -> str:
+        parts = urlsplit(url)
+        query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in ignored))
+        return f"{method} {parts.netloc}{parts.path}{'?' + query if query else ''}"
+
+    def send(self, session: requests.Session, prepped: requests.PreparedRequest, timeout: float | None = None) -> requests.Response:
+        key = self.key(prepped.method, prepped.url)
+        with self._lock:
+            self.requests[endpoint_template(prepped.url)] += 1
+        if self.mode == self.RECORD:
+            started = time.perf_counter()
+            resp = session.send(prepped, timeout=timeout)
+            self._record(key, resp, time.perf_counter() - started)
+            return resp
+        return self._replay(key, prepped)
+
+    def _record(self, key: str, resp: requests.Response, elapsed: float):
+        try:
+            body, is_json = resp.json(), True
+        except ValueError:
+            body, is_json = JWT_RE.sub(SCRUBBED, resp.text), False
+        entry = {"status": resp.status_code, "elapsed": round(elapsed, 4), "json": is_json}
+        content_type = resp.headers.get("Content-Type")
+        if content_type:
+            entry["content_type"] = content_type
+        with self._lock:
+            entry["body"] = scrub(body, self._aliases) if is_json else body
+            self._interactions.setdefault(key, []).append(entry)
+
+    def _replay(self, key: str, prepped: requests.PreparedRequest) -> requests.Response:
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                raise CassetteError(f"No recorded response for {key}")
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+        # Requests made more often than recorded get the last recorded response
+        entry = entries[min(index, len(entries) - 1)]
+        if self.mode == self.REPLAY and entry["elapsed"] > 0:
+            time.sleep(entry["elapsed"])
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp._content = (json.dumps(entry["body"], separators=(",", ":")) if entry["json"] else entry["body"]).encode()
+        resp.headers = CaseInsensitiveDict({"Content-Type": entry.get("content_type", "application/json")})
+        resp.encoding = "utf-8"
+        resp.url = prepped.url
+        resp.request = prepped
+        return resp
+
+    def rewind(self):
+        with self._lock:
+            self._cursor.clear()
+
+    def load(self):
+        with gzip.open(self.path, "rt", encoding="utf-8") as cassette:
+            data = json.load(cassette)
+        with self._lock:
+            self._interactions = data.get("interactions", {})
+            self.meta = data.get("meta", {})
+            self._cursor.clear()
+
+    def save(self):
+        with self._lock:
+            data = {"version": 1, "meta": self.meta, "interactions": self._interactions}
+            with gzip.open(self.path, "wt", encoding="utf-8") as cassette:
+                json.dump(data, cassette, separators=(",", ":"))
@@ -6,5 +6,63 @@ CONF_USERNAME_LABEL: Final = 'Which usernames to consider:'
 CONF_JWT: Final = 'jwt'
 CONF_INTERVAL: Final = 'interval'
 FORCE_SCRAPE: Final = "scrape_duolingo_data"
+# Seconds a forced scrape has to wait after the previous one
+FORCE_REFRESH_SPACING: Final = 60
 
 functionType: Final = type(lambda _:_)
+TRACE_CYCLES: Final = 10
+SNAPSHOT_VERSION: Final = 1
+SNAPSHOT_SAVE_DELAY: Final = 30
+HISTORY_VERSION: Final = 1
+HISTORY_DAYS: Final = 400
+ATTR_RESTORED_FROM: Final = "restored_from"
+# Key of the response cache shared by all config entries in hass.data[DOMAIN], next to the coordinators
+SHARED_CACHE: Final = "shared_cache"
+SHARED_CACHE_TTL: Final = 120
+# Key of the thread pool running the blocking requests of all config entries, in hass.data[DOMAIN]
+SHARED_EXECUTOR: Final = "shared_executor"
+# Key of the listener stopping that pool with Home Assistant
+SHARED_EXECUTOR_STOP: Final = "shared_executor_stop"
+EXECUTOR_WORKERS: Final = 4
+# Seconds a Duolingo request may take to connect and to answer, a stuck one must not hold a thread forever
+REQUEST_TIMEOUT: Final = 30
+# Key of the refresh phases of the users of all config entries, in hass.data[DOMAIN]
+SHARED_STAGGER: Final = "shared_stagger"
+
+SERVICE_PROFILE: Final = "profile"
+SERVICE_REFRESH: Final = "refresh"
+ATTR_CONFIG_ENTRY_ID: Final = "config_entry_id"
+ATTR_CYCLES: Final = "cycles"
+ATTR_ENTITIES: Final = "entities"
+ATTR_TOP: Final = "top"
+ATTR_USERNAMES: Final = "usernames"
+ATTR_CATEGORIES: Final = "categories"
+
+CONF_DISABLED_CATEGORIES: Final = 'disabled_categories'
+CONF_COMPACT_ATTRIBUTES: Final = 'compact_attributes'
+CONF_ADAPTIVE_POLLING: Final = 'adaptive_polling'
+CONF_MIN_INTERVAL: Final = 'min_interval'
+CONF_MAX_INTERVAL: Final = 'max_interval'
+DEFAULT_MIN_INTERVAL: Final = 10
+DEFAULT_MAX_INTERVAL: Final = 120
+# Bulky attributes which compact sensors keep out of the recorder
+ATTR_FOLLOWING: Final = "following"
+ATTR_RANKING: Final = "ranking"
+CATEGORY_USER: Final = "user"
+CATEGORY_LEADERBOARD: Final = "leaderboard"
+CATEGORY_FRIENDS: Final = "friends"
+CATEGORY_FRIEND_STREAKS: Final = "friend_streaks"
+CATEGORY_QUESTS: Final = "quests"
+# Category -> attribute of the Duolingo client (and key of the entity descriptions)
+CATEGORY_KEYS: Final = {
+    CATEGORY_USER: "user_data",
+    CATEGORY_LEADERBOARD: "leaderboard_data",
+    CATEGORY_FRIENDS: "friends_data",
+    CATEGORY_FRIEND_STREAKS: "friend_streaks_data",
+    CATEGORY_QUESTS: "quest_data",
+}
+KEY_CATEGORIES: Final = {
+    **{key: category for category, key in CATEGORY_KEYS.items()},
+    # Kept by the coordinator from the user data
+    "xp_history": CATEGORY_USER,
+}
@@ -1,42 +1,486 @@
-from datetime import timedelta
+import asyncio, contextlib, time
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from functools import partial
 import logging
 from typing import Dict, Any
 
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryError
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.components.persistent_notification import (
+    async_create as async_create_persistent_notification,
+)
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN
+from .const import DOMAIN, TRACE_CYCLES, CATEGORY_KEYS, SNAPSHOT_VERSION, SNAPSHOT_SAVE_DELAY, HISTORY_VERSION, FORCE_REFRESH_SPACING
+from .cache import SharedCache
+from .duolingo import CohortRegistry, Duolingo
+from .executor import DuolingoExecutor
 from .duolingo_api import (
     DuolingoAPI,
     FailedToLogin,
 )
+from .history import XpHistory
+from .profiler import RefreshProfiler
+from .scheduler import PollScheduler, RefreshStagger
+from .statistics import async_import_xp_statistics
+from .tracing import RefreshTracer, Span, run_in_span
 
 _LOGGER = logging.getLogger(__name__)
 
+# Longest wait between two refreshes of a user which keeps failing
+MAX_BACKOFF = timedelta(hours=2)
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Store holding the last successful refresh of a config entry."""
+    return Store(hass, SNAPSHOT_VERSION, f"{DOMAIN}.{entry_id}")
+
+def history_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Store holding the daily XP history of a config entry."""
+    return Store(hass, HISTORY_VERSION, f"{DOMAIN}.{entry_id}.history")
+
+class DuolingoUserCoordinator(DataUpdateCoordinator[Duolingo]):
+    """
+    Refreshes one tracked user on its own schedule. A slow or failing account only delays and backs off
+    its own entities, the supervisor merges each refresh into the data of the config entry.
+    """
+    def __init__(self, hass: HomeAssistant, supervisor: "DuolingoDataCoordinator", client: DuolingoAPI, index: int):
+        self.client = client
+        self.username = client.get_username()
+        self.label = f"user_{index + 1}"
+        self.failures = 0
+        self._supervisor = supervisor
+        self._interval = timedelta(minutes=client.get_interval())
+        # Fetch in progress, joined by a scheduled refresh and a refresh of the whole entry arriving at the same time
+        self._inflight: asyncio.Task | None = None
+        # Trace of the last finished fetch, the entity updates it triggers are timed into it
+        self.cycle: Span | None = None
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {self.username}",
+            update_method=self._async_update_data,
+            update_interval=self._interval,
+        )
+
+    async def _async_update_data(self) -> Duolingo:
+        if self._inflight is None:
+            self._inflight = self.hass.async_create_task(self._async_fetch())
+            self._inflight.add_done_callback(self._fetch_done)
+        # Shielded, so a caller giving up does not cancel the fetch for the others
+        return await asyncio.shield(self._inflight)
+
+    @callback
+    def _fetch_done(self, _task: asyncio.Task) -> None:
+        self._inflight = None
+
+    async def async_refresh_categories(self, categories: set[str]) -> None:
+        """
+        Fetch only ``categories`` of this user now. The client keeps the other categories, so the result is merged
+        into the data the entities already show. Raises ``UpdateFailed``.
+        """
+        while self._inflight is not None:
+            with contextlib.suppress(Exception):
+                await asyncio.shield(self._inflight)
+        self._inflight = self.hass.async_create_task(self._async_fetch(categories, True))
+        self._inflight.add_done_callback(self._fetch_done)
+        self.async_set_updated_data(await asyncio.shield(self._inflight))
+
+    async def _async_fetch(self, categories: set[str] | None = None, force: bool | None = None) -> Duolingo:
+        supervisor = self._supervisor
+        if categories is None:
+            categories = supervisor.categories_for(self.username)
+        if force is None:
+            force = supervisor.forced
+        cycle = supervisor.tracer.start_cycle("coordinator.refresh", user=self.label)
+        profiler = supervisor.active_profiler()
+        profiled = profiler is not None and profiler.begin_cycle()
+        job = partial(run_in_span, cycle, "Duolingo.update", self.client.update, categories, force, user=self.label, categories=sorted(categories))
+        try:
+            lingo = await supervisor.async_run(job)
+        except FailedToLogin as err:
+            self._back_off()
+            raise UpdateFailed(f"Failed to log in as {self.username}") from err
+        except Exception as err:
+            self._back_off()
+            raise UpdateFailed(f"Failed to refresh {self.username}: {err}") from err
+        finally:
+            cycle.finish()
+            self.cycle = cycle
+            supervisor.async_cycle_done(profiler, profiled)
+
+        self.failures = 0
+        scheduler = supervisor.scheduler
+        interval = self._interval if scheduler is None else scheduler.observe(self.username, lingo.user_data, dt_util.now())
+        if supervisor.stagger is not None:
+            # Refresh in this user's slot, not at the same instant as everyone refreshed with it
+            now = dt_util.utcnow().timestamp()
+            if scheduler is None:
+                interval = supervisor.stagger.delay(self.username, interval, now)
+            else:
+                # Never outside the range adaptive polling promises
+                interval = supervisor.stagger.delay(self.username, interval, now, scheduler.min_interval, scheduler.max_interval)
+        self.update_interval = interval
+        return lingo
+
+    def _back_off(self) -> None:
+        self.failures += 1
+        self.update_interval = min(self._interval * 2 ** self.failures, MAX_BACKOFF)
+
+
 class DuolingoDataCoordinator(DataUpdateCoordinator[Dict[str, Any]]):
-    def __init__(self, hass: HomeAssistant, clients: list[DuolingoAPI]):
+    """
+    Supervisor of the per-user coordinators of a config entry.
+
+    Its data maps every username to the ``Duolingo`` client last refreshed by that user's coordinator. Entities listen
+    with their username as context and update as soon as their own user is refreshed, listeners without a context
+    (the leaderboard) on every user. It has no schedule of its own: a refresh of the supervisor (first refresh,
+    forced scrape) refreshes every user, one after the other.
+    """
+    def __init__(self, hass: HomeAssistant, clients: list[DuolingoAPI], disabled_categories: list[str] | None = None, store: Store | None = None, cohorts: CohortRegistry | None = None, history: XpHistory | None = None, history_store: Store | None = None, scheduler: PollScheduler | None = None, executor: DuolingoExecutor | None = None, stagger: RefreshStagger | None = None, cache: SharedCache | None = None):
         self._clients = clients
-        interval = self._clients[0].get_interval() if len(self._clients) > 0 else 30
+        self._cohorts = cohorts
+        self._store = store
+        self.history = history
+        self._history_store = history_store
+        self._refreshed_at: dict[str, datetime] = {}
+        self.scheduler = scheduler
+        self.executor = executor
+        self.stagger = stagger
+        self.cache = cache
+        self.forced = False
+        # Refresh of the whole entry in progress, and when the last forced one started
+        self._refreshing: asyncio.Task | None = None
+        self._forced_at: float | None = None
+        self.restored_at: datetime | None = None
+        # Users still showing the snapshot, they stay available until their first refresh
+        self._restored: set[str] = set()
+        self._disabled_categories = set(disabled_categories or [])
+        self._consumers: Counter[tuple[str, str]] = Counter()
+        self._known: set[tuple[str, str]] = set()
+        self._planning = False
+        self._refreshing_all = False
+        self.tracer = RefreshTracer(TRACE_CYCLES)
+        self._cycle: Span | None = None
+        # Called when the entry unloads, e.g. to end websocket subscriptions held by the frontend
+        self._shutdown_callbacks: list[CALLBACK_TYPE] = []
+        self.profiler: RefreshProfiler | None = None
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
             update_method=self._async_update_data,
-            update_interval=timedelta(minutes=interval),
+            update_interval=None,
         )
-    
+
+        self.users = {client.get_username(): DuolingoUserCoordinator(hass, self, client, index) for index, client in enumerate(clients)}
+        self._unsub_users = [
+            user.async_add_listener(partial(self._async_user_updated, username)) for username, user in self.users.items()
+        ]
+        if stagger is not None:
+            self._unsub_users.extend(stagger.add(username) for username in self.users)
+
     async def _async_update_data(self) -> Dict[str, Any]:
+        if self._cohorts is not None:
+            self._cohorts.start_cycle()
+        self._refreshing_all = True
         try:
-            data = {}
-            for client in self._clients:
-                try:
-                    data[client.get_username()] = await self.hass.async_add_executor_job(client.update)
-                except:
-                    pass
-            return data
-        except FailedToLogin as err:
-            raise ConfigEntryError("Failed to Log-in") from err
-        except Exception as err:
-            raise ConfigEntryError("Duolingo encoutered unknown") from err
\ No newline at end of file
+            for user in self.users.values():
+                await user.async_refresh()
+                # The listeners are updated once for all users, timed into the trace of the last one
+                self._cycle = user.cycle
+        finally:
+            self._refreshing_all = False
+            self.forced = False
+        if self.users and not any(user.last_update_success for user in self.users.values()):
+            raise UpdateFailed("None of the Duolingo users could be refreshed")
+        return dict(self.data or {})
+
+    async def async_run(self, func: Callable, *args) -> Any:
+        """Run blocking Duolingo I/O on the integration's executor, or the one of Home Assistant without it."""
+        if self.executor is None:
+            return await self.hass.async_add_executor_job(func, *args)
+        return await self.executor.async_run(self.hass, func, *args)
+
+    async def async_refresh(self) -> None:
+        """Refresh every user, or wait for the refresh of the whole entry already running instead of starting another."""
+        if self._refreshing is None:
+            self._refreshing = self.hass.async_create_task(super().async_refresh())
+            self._refreshing.add_done_callback(self._refresh_done)
+        await asyncio.shield(self._refreshing)
+
+    @callback
+    def _refresh_done(self, _task: asyncio.Task) -> None:
+        self._refreshing = None
+
+    async def async_force_refresh(self) -> None:
+        """
+        Refresh every user now, whatever the adaptive polling or the contest schedule planned.
+        Joins a refresh already running, and is ignored within ``FORCE_REFRESH_SPACING`` seconds of the last one.
+        """
+        if self._refreshing is None:
+            now = time.monotonic()
+            if self._forced_at is not None and now - self._forced_at < FORCE_REFRESH_SPACING:
+                _LOGGER.debug("Ignoring forced refresh, the last one started %.0f seconds ago", now - self._forced_at)
+                return
+            self._forced_at = now
+            self.forced = True
+            # A forced refresh should not be answered from responses cached by the last one
+            if self.cache is not None:
+                self.cache.clear()
+        await self.async_refresh()
+
+    async def async_refresh_categories(self, usernames: list[str], categories: set[str]) -> list[str]:
+        """Fetch only ``categories`` of ``usernames``, one user after the other. Returns the users which failed."""
+        failed = []
+        for username in usernames:
+            try:
+                await self.users[username].async_refresh_categories(categories)
+            except UpdateFailed as err:
+                _LOGGER.warning("%s", err)
+                failed.append(username)
+        return failed
+
+    @callback
+    def async_on_shutdown(self, shutdown_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Call ``shutdown_callback`` when the config entry unloads. Returns a function removing it again."""
+        self._shutdown_callbacks.append(shutdown_callback)
+
+        @callback
+        def remove() -> None:
+            if shutdown_callback in self._shutdown_callbacks:
+                self._shutdown_callbacks.remove(shutdown_callback)
+
+        return remove
+
+    async def async_shutdown(self) -> None:
+        callbacks, self._shutdown_callbacks = self._shutdown_callbacks, []
+        for shutdown_callback in callbacks:
+            shutdown_callback()
+        for unsub in self._unsub_users:
+            unsub()
+        self._unsub_users.clear()
+        for user in self.users.values():
+            await user.async_shutdown()
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            # Stopping tracemalloc frees every trace, not a job for the event loop
+            await self.hass.async_add_executor_job(profiler.detach)
+        await super().async_shutdown()
+
+    @callback
+    def _async_user_updated(self, username: str) -> None:
+        user = self.users[username]
+        if user.last_update_success:
+            self.data = {**(self.data or {}), username: user.data}
+            self._refreshed_at[username] = dt_util.utcnow()
+            self._restored.discard(username)
+            if not self._restored:
+                self.restored_at = None
+            self._record_history(username, user.data)
+            self._async_save_snapshot()
+        # A refresh of the whole entry updates every listener once it is done
+        if not self._refreshing_all:
+            self._async_update_user_listeners(username, user.cycle)
+
+    def restored_from(self, username: str | None = None) -> datetime | None:
+        """
+        When the snapshot still shown for ``username`` was saved, None once that user has refreshed.
+        Without a username: as long as any user of the entry still shows the snapshot.
+        """
+        if username is None or username in self._restored:
+            return self.restored_at
+        return None
+
+    def user_available(self, username: str) -> bool:
+        user = self.users.get(username)
+        return user is not None and (user.last_update_success or username in self._restored)
+
+    @callback
+    def async_cycle_done(self, profiler: RefreshProfiler | None, profiled: bool) -> None:
+        if profiler is not None:
+            profiler.end_cycle(profiled)
+            if profiler.done and not profiler.entities:
+                self._async_finish_profiling()
+
+    @callback
+    def async_restore(self, saved_at: str | None) -> bool:
+        """Use the data of clients restored from a snapshot until the first refresh, return whether there was any."""
+        data = {client.get_username(): client.get_data() for client in self._clients if client.restored}
+        if not data:
+            return False
+        self.data = data
+        for username, lingo in data.items():
+            self.users[username].data = lingo
+            if self.history is not None:
+                lingo.xp_history = self.history.user(username)
+        self.restored_at = (dt_util.parse_datetime(saved_at) if saved_at else None) or dt_util.utcnow()
+        self._restored = set(data)
+        self._refreshed_at = {username: self.restored_at for username in data}
+        return True
+
+    @callback
+    def _async_save_snapshot(self) -> None:
+        if self._store is not None:
+            self._store.async_delay_save(self._snapshot, SNAPSHOT_SAVE_DELAY)
+        if self.history is not None:
+            async_import_xp_statistics(self.hass, self.history)
+        if self._history_store is not None and self.history is not None:
+            self._history_store.async_delay_save(self.history.as_dict, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _record_history(self, username: str, lingo) -> None:
+        if self.history is None:
+            return
+        history = self.history.user(username)
+        history.record(lingo.user_data)
+        lingo.xp_history = history
+
+    @callback
+    def _snapshot(self) -> Dict[str, Any]:
+        users = [client for client in self._clients if client.get_username() in (self.data or {})]
+        return {
+            # The oldest user decides, so a restart never reports kept data as fresher than it is
+            "saved_at": min(self._refreshed_at[client.get_username()] for client in users).isoformat() if users else None,
+            "users": {client.get_username(): client.dump() for client in users},
+        }
+
+    @property
+    def usernames(self) -> list[str]:
+        return list(self.users)
+
+    def user_labels(self) -> dict[str, str]:
+        """Username -> ``user_N`` label, used instead of usernames in the diagnostics."""
+        return {username: user.label for username, user in self.users.items()}
+
+    def user_stats(self) -> list[Dict[str, Any]]:
+        return [
+            {
+                "user": user.label,
+                "available": self.user_available(username),
+                "interval_min": user.update_interval.total_seconds() / 60 if user.update_interval else None,
+                "failures": user.failures,
+                "phase": round(self.stagger.phase(username), 3) if self.stagger is not None else None,
+            }
+            for username, user in self.users.items()
+        ]
+
+    def cohort_stats(self) -> Dict[str, int] | None:
+        if self._cohorts is None:
+            return None
+        return {"fetched": self._cohorts.fetched, "reused": self._cohorts.reused}
+
+    @callback
+    def async_add_consumer(self, username: str, category: str) -> CALLBACK_TYPE:
+        """Register an enabled entity which reads ``category`` of ``username``."""
+        key = (username, category)
+        self._consumers[key] += 1
+        self._known.add(key)
+
+        @callback
+        def remove_consumer() -> None:
+            self._consumers[key] -= 1
+            if self._consumers[key] <= 0:
+                del self._consumers[key]
+
+        return remove_consumer
+
+    @callback
+    def async_mark_known(self, username: str, category: str) -> None:
+        """Record that entities (enabled or not) exist for ``category`` of ``username``."""
+        self._known.add((username, category))
+
+    @callback
+    def async_start_planning(self) -> None:
+        """Start skipping unused categories, called once every platform has added its entities."""
+        self._planning = True
+
+    def categories_for(self, username: str) -> set[str]:
+        """
+        Categories to fetch for ``username``: everything not disabled in the options which an enabled entity reads.
+        Categories without any entity are still fetched, so new courses and friend streaks are discovered.
+        """
+        categories = set(CATEGORY_KEYS) - self._disabled_categories
+        if not self._planning:
+            return categories
+        return {
+            category for category in categories
+            if self._consumers.get((username, category)) or (username, category) not in self._known
+        }
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all registered listeners."""
+        cycle, self._cycle = self._cycle, None
+        self._async_notify(super().async_update_listeners, cycle)
+
+    @callback
+    def _async_update_user_listeners(self, username: str, cycle: Span | None = None) -> None:
+        """Update the listeners of ``username`` and the ones without a context."""
+        @callback
+        def update() -> None:
+            for update_callback, context in list(self._listeners.values()):
+                if context is None or context == username:
+                    update_callback()
+
+        self._async_notify(update, cycle)
+
+    @callback
+    def _async_notify(self, update: Callable[[], None], cycle: Span | None) -> None:
+        """
+        Run ``update``, timing the entity state derivation as part of ``cycle``, the finished fetch which triggered it.
+        Fetches of other users may be in flight meanwhile, so it is not simply the last traced one.
+        """
+        profiler = self.active_profiler()
+        if cycle is None or any(child.name == "derive" for child in cycle.children):
+            update()
+        else:
+            run_in_span(cycle, "derive", update, listeners=len(self._listeners))
+            cycle.extend_to(cycle.children[-1].end)
+        if profiler is not None and profiler.entities and profiler.done:
+            self._async_finish_profiling()
+
+    async def async_start_profiling(self, profiler: RefreshProfiler) -> None:
+        """Count the refresh cycles of this entry towards ``profiler``, started and shared by a service call."""
+        profiler.attach()
+        previous, self.profiler = self.profiler, profiler
+        if previous is not None:
+            await self.hass.async_add_executor_job(previous.detach)
+
+    @callback
+    def active_profiler(self) -> RefreshProfiler | None:
+        """The profiler of this entry, dropped once another entry sharing it has written the report."""
+        profiler = self.profiler
+        if profiler is not None and profiler.reported:
+            self.profiler = None
+            profiler.detach()
+            return None
+        return profiler
+
+    @callback
+    def _async_finish_profiling(self) -> None:
+        profiler, self.profiler = self.profiler, None
+        if profiler is not None:
+            # Another entry may already be writing the report of a shared profiler
+            if profiler.claim_report():
+                self.hass.async_create_task(self._async_write_profile(profiler))
+            profiler.detach()
+
+    async def _async_write_profile(self, profiler: RefreshProfiler) -> None:
+        path = self.hass.config.path(f"duolingo_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        try:
+            summary = await self.hass.async_add_executor_job(profiler.write_report, path)
+        except (OSError, RuntimeError) as err:
+            # RuntimeError: tracemalloc was stopped by someone else (e.g. the HA profiler integration)
+            _LOGGER.error("Failed to write Duolingo profile to %s: %s", path, err)
+            return
+        async_create_persistent_notification(
+            self.hass,
+            title="Duolingo profile",
+            message=summary,
+            notification_id=f"{DOMAIN}_profile",
+        )
@@ -0,0 +1,39 @@
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_USERNAME,
+    )
+
+from .const import (
+    DOMAIN,
+    CONF_JWT,
+    SHARED_CACHE,
+    SHARED_EXECUTOR,
+    )
+from .coordinator import DuolingoDataCoordinator
+
+TO_REDACT = {
+    CONF_JWT,
+    CONF_USERNAME,
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: DuolingoDataCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    return {
+        "entry": async_redact_data(config_entry.as_dict(), TO_REDACT),
+        "users": len(config_entry.data.get(CONF_USERNAME, [])),
+        "refresh_cycles": coordinator.tracer.as_list(),
+        "user_coordinators": coordinator.user_stats(),
+        "cohorts": coordinator.cohort_stats(),
+        "polling": coordinator.scheduler.as_dict(coordinator.user_labels()) if coordinator.scheduler is not None else None,
+        "shared_cache": hass.data[DOMAIN][SHARED_CACHE].as_dict() if SHARED_CACHE in hass.data[DOMAIN] else None,
+        "executor": hass.data[DOMAIN][SHARED_EXECUTOR].as_dict() if SHARED_EXECUTOR in hass.data[DOMAIN] else None,
+    }
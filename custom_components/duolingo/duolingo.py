@@ -1,9 +1,16 @@
-import re, json, random, requests, logging
+import re, json, random, requests, logging, threading, time
 _LOGGER = logging.getLogger(__name__)
+from contextlib import nullcontext
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from json import JSONDecodeError
 from typing import Final
 
+from .cache import bypass
+from .const import CATEGORY_KEYS, REQUEST_TIMEOUT
+from .records import DEFAULT_AVATAR, Course, Friend, FriendStreak, RankingRow, RecordCache, StreakFriend, intern
+from .tracing import span, endpoint_template
+
 LIMIT = 10
 
 class DuolingoException(Exception):
@@ -33,22 +40,86 @@ TIER_LIST: Final = {
                         "8": "Obsidian",
                         "9": "Diamond",
                     }
+# Days of xp_summaries kept by ``DuolingoUserData``, more than the API returns without a date window
+XP_HISTORY_DAYS: Final = 90
+USER_SNAPSHOT_FIELDS: Final = {
+    "by_username": ("id", "username", "fullname", "avatar", "daily_goal", "streak_extended_today", "learning_language_string"),
+    "by_id": ("id", "gems", "streakData", "lastStreak", "xpGoal", "totalXp", "currentCourseId", "learningLanguage", "xp_summaries"),
+}
+COURSE_SNAPSHOT_FIELDS: Final = ("title", "subject", "topic", "learningLanguage", "fromLanguage", "xp", "id", "cefrScore")
+# ``?fields=`` projection of the user document, only what ``DuolingoUserData`` reads
+USER_FIELDS: Final = (
+    "id", "username", "name", "picture", "totalXp", "gems", "xpGoal", "currentCourseId", "learningLanguage",
+    "fromLanguage", "streakData", "lastStreak", "courses{title,subject,topic,learningLanguage,fromLanguage,xp,id}",
+)
+FRIEND_SNAPSHOT_FIELDS: Final = ("username", "displayName", "picture", "hasSubscription", "totalXp", "userId")
+RANKING_SNAPSHOT_FIELDS: Final = ("avatar_url", "display_name", "has_plus", "score", "streak_extended_today", "user_id")
+# Time left in the contest -> time between two leaderboard fetches, the last contest hour is fetched on every update
+LEADERBOARD_POLL_STEPS: Final = (
+    (timedelta(days=2), timedelta(hours=4)),
+    (timedelta(days=1), timedelta(hours=2)),
+    (timedelta(hours=6), timedelta(hours=1)),
+    (timedelta(hours=1), timedelta(minutes=20)),
+)
+# Contest over but the new one not published yet
+LEADERBOARD_ROLLOVER_RETRY: Final = timedelta(minutes=30)
+
+def _pick(data: dict, keys) -> dict:
+    return {key: data[key] for key in keys if key in data}
+
+SPECIAL_COURSES: Final = ("MUSIC_MT", "CHESS_CH", "MATH_BT")
+
+def course_records(courses: list[dict]) -> list[Course]:
+    output = []
+    for course in courses:
+        if not all(k in course.keys() for k in ["title", "learningLanguage", "xp", "fromLanguage", "id"]) and not("id" in course.keys() and course["id"] in SPECIAL_COURSES):
+            continue
+        special = course["id"] in SPECIAL_COURSES
+        output.append(Course(
+            name=intern(str(course["subject"]).capitalize() if special else course["title"]),
+            language=intern(course["topic"] if special else course["learningLanguage"]),
+            from_=intern(course["fromLanguage"]),
+            xp=course["xp"],
+            id=intern(course["id"]),
+            score=course.get("cefrScore"),
+        ))
+    return output
+
+def friend_records(users: list[dict]) -> list[Friend]:
+    return [
+        Friend(
+            username=user["username"],
+            display_name=user["displayName"],
+            picture=user["picture"],
+            subscription=user["hasSubscription"],
+            xp=user["totalXp"],
+            user_id=user["userId"],
+        )
+        for user in users if all(
+            k in user.keys() for k in ["displayName", "hasSubscription", "totalXp", "userId", "username", "picture"]
+        )
+    ]
+
 class Base:
     USER_AGENT = lambda _, x: "Duodroid/7.6.0 (Linux; Android 15)" \
                            if x else \
                            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36"
 
-    def __init__(self, username, password=None, jwt=None, start_on_monday=True, *args, **kwargs):
+    def __init__(self, username, password=None, jwt=None, start_on_monday=True, cassette=None, cache=None, *args, **kwargs):
         """
         :param username: Username to use for duolingo
         :param password: Password to authenticate as user.
         :param jwt: Duolingo login token. Will be checked and used if it is valid request.
+        :param cassette: Optional ``Cassette`` which records or replays every request.
+        :param cache: Optional ``SharedCache`` reused by every client (and config entry) for GET requests.
         """
         self.username = username
         self.password = password
         self.session = requests.Session()
         self.jwt = jwt
         self.start_on_monday = start_on_monday
+        self.cassette = cassette
+        self.cache = cache
 
     def _check_login(self):
         resp = self._make_req(f"https://www.duolingo.com/2023-05-23/friends/users?username={self.username}&searchType=USERNAME")
@@ -70,7 +141,19 @@ class Base:
                                params=params,
                                headers=headers)
         prepped = req.prepare()
-        resp = self.session.send(prepped)
+        if self.cassette is not None:
+            send = partial(self.cassette.send, self.session, prepped, timeout=REQUEST_TIMEOUT)
+        else:
+            send = partial(self.session.send, prepped, timeout=REQUEST_TIMEOUT)
+        with span("http", method=method, endpoint=endpoint_template(url, self.username)) as http_span:
+            if self.cache is not None and method == 'GET':
+                resp, cached = self.cache.fetch(self.cache.key(self.jwt, prepped.url), send)
+            else:
+                resp, cached = send(), False
+            if http_span is not None:
+                http_span.attrs["cached"] = cached
+                http_span.attrs["status"] = resp.status_code
+                http_span.attrs["bytes"] = len(resp.content)
         if resp.status_code == 403:
             try:
                 if resp.json().get("blockScript") is not None:
@@ -84,6 +167,10 @@ class Base:
             raise DuolingoException(f"Request to URL: {url}, returned status code {resp.status_code}")
         return resp
 
+    def _json(self, resp):
+        with span("parse"):
+            return resp.json()
+
     def _make_latest_update_date(self):
         return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
@@ -119,7 +206,19 @@ class DuolingoBase(Base):
                 return default
 
         return self._data.get(key, default)
-        
+
+    def dump(self) -> dict:
+        """
+        Compact copy of the fetched data for the coordinator snapshot.
+        """
+        return self._data
+
+    def load(self, data: dict):
+        """
+        Restore data produced by ``dump``.
+        """
+        self._data = data or {}
+
     def switch_language(self, user_id=None, course_id=None, from_lang=None, fields=None):
         """
         Change the learned language with ``https://www.duolingo.com/2023-05-23/users/<user_id>``.
@@ -131,28 +230,31 @@ class DuolingoBase(Base):
 
         try:
             request = self._make_req(url, data, method='PATCH')
-            parse = request.json()
+            parse = self._json(request)
             return parse
         except (ValueError, DuolingoException):
             return False
 
 class DuolingoUserData(DuolingoBase):
-    def __init__(self, username, password=None, jwt=None, *args, **kwargs):
+    def __init__(self, username, password=None, jwt=None, user_id=None, *args, **kwargs):
         """
         :param username: Username to use for duolingo
         :param password: Password to authenticate as user.
         :param jwt: Duolingo login token. Will be checked and used if it is valid request.
+        :param user_id: Id of the user, needed before the first update. Set by ``Duolingo`` when not known yet.
         """
         super().__init__(username, password, jwt, *args, **kwargs)
+        self.known_user_id = user_id
+        self._courses = RecordCache()
         self._internal_data = {}
         self._update_internal_data()
     
     def update(self, *args, **kwargs):
         old_data = self._data
         try:
-            by_username = self._get_data(self.username)
-            by_id = self._get_data_by_id(by_username.get("id"))
-            xp_summaries = self._get_xp_summaries_by_id(by_username.get("id"))
+            by_id = self._get_data_by_id(self.user_id, USER_FIELDS)
+            xp_summaries = self._sync_xp_summaries(by_id.get("id"))
+            by_username = self._profile(by_id, xp_summaries)
             learning_lang_id = by_id.get("currentCourseId")
             learning_lang_abbr = by_id.get("learningLanguage")
             if learning_lang_id is not None and learning_lang_abbr is not None:
@@ -184,6 +286,46 @@ class DuolingoUserData(DuolingoBase):
             self._data = {**old_data, "last_update": self._make_latest_update_date()}
         self._update_internal_data()
 
+    @staticmethod
+    def _profile(by_id: dict, xp_summaries: dict) -> dict:
+        """
+        Fields of the legacy ``https://duolingo.com/users/<username>`` document, which is no longer downloaded,
+        derived from the user document and the xp summaries.
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        extended = by_id.get("streakData", {}).get("currentStreak", {}).get("lastExtendedDate") == today
+        for summary in xp_summaries.get("summaries", []):
+            if "date" in summary and DuolingoUserData._xp_day(summary) == today:
+                extended = bool(summary.get("streakExtended", extended))
+        current = next((course for course in by_id.get("courses", []) if course.get("id") == by_id.get("currentCourseId")), {})
+        profile = {
+            "id": by_id.get("id"),
+            "username": by_id.get("username"),
+            "fullname": by_id.get("name"),
+            "avatar": by_id.get("picture"),
+            "daily_goal": by_id.get("xpGoal"),
+            "streak_extended_today": extended,
+            "learning_language_string": current.get("title"),
+        }
+        return {key: value for key, value in profile.items() if value is not None}
+
+    def dump(self) -> dict:
+        return {
+            "by_username": _pick(self._data.get("by_username", {}), USER_SNAPSHOT_FIELDS["by_username"]),
+            "by_id": {
+                **_pick(self._data.get("by_id", {}), USER_SNAPSHOT_FIELDS["by_id"]),
+                "courses": [_pick(course, COURSE_SNAPSHOT_FIELDS) for course in self._data.get("by_id", {}).get("courses", [])],
+            },
+            "last_update": self._data.get("last_update"),
+            "internal": self._internal_data,
+        }
+
+    def load(self, data: dict):
+        data = dict(data or {})
+        self._internal_data = data.pop("internal", None) or {}
+        self._data = data
+        self._update_internal_data()
+
     def _should_update_courses(self):
         return not self._internal_data.get("already_updated", False)
 
@@ -272,41 +414,74 @@ class DuolingoUserData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
 
-    def _get_data_by_id(self, user_id=None):
+    def _get_data_by_id(self, user_id=None, fields=None):
         """
         Get user's data from ``https://www.duolingo.com/2023-05-23/users/<user_id>``.
+
+        :param fields: Fields to return (``?fields=`` projection), the whole document when None.
         """
         if user_id is None:
             user_id = self.user_id
         if user_id is None:
             raise Exception("User ID is None")
         
-        get = self._make_req(f"https://www.duolingo.com/2023-05-23/users/{user_id}")
+        get = self._make_req(f"https://www.duolingo.com/2023-05-23/users/{user_id}", params={"fields": ",".join(fields)} if fields is not None else None)
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
 
-    def _get_xp_summaries_by_id(self, user_id=None):
+    def _get_xp_summaries_by_id(self, user_id=None, start_date=None, end_date=None):
         """
         Get user's data from ``https://www.duolingo.com/2023-05-23/users/<user_id>/xp_summaries``.
+
+        :param start_date: First day (``YYYY-MM-DD``) to return, the default window of the API when None.
+        :param end_date: Last day (``YYYY-MM-DD``) to return.
         """
         if user_id is None:
             user_id = self.user_id
         if user_id is None:
             raise Exception("User ID is None")
 
-        get = self._make_req(f"https://www.duolingo.com/2023-05-23/users/{user_id}/xp_summaries")
+        params = {key: value for key, value in (("startDate", start_date), ("endDate", end_date)) if value is not None}
+        get = self._make_req(f"https://www.duolingo.com/2023-05-23/users/{user_id}/xp_summaries", params=params or None)
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
+
+    @staticmethod
+    def _xp_day(summary: dict) -> str:
+        return datetime.fromtimestamp(int(summary["date"])).strftime("%Y-%m-%d")
+
+    def _sync_xp_summaries(self, user_id=None):
+        """
+        Merge the days since the last sync into the summaries kept from the previous updates.
+        Only the last known day, which may still have changed, and the days after it are requested.
+        """
+        days = {}
+        for summary in self._data.get("by_id", {}).get("xp_summaries", {}).get("summaries", []):
+            if "date" in summary:
+                days[self._xp_day(summary)] = summary
+
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        oldest = (today - timedelta(days=XP_HISTORY_DAYS - 1)).strftime("%Y-%m-%d")
+        if days:
+            start = max(max(days), oldest)
+            fetched = self._get_xp_summaries_by_id(user_id, start, today.strftime("%Y-%m-%d"))
+        else:
+            fetched = self._get_xp_summaries_by_id(user_id)
+
+        for summary in fetched.get("summaries", []):
+            if "date" in summary:
+                days[self._xp_day(summary)] = summary
+        return {"summaries": [days[day] for day in sorted(days, reverse=True) if day >= oldest]}
         
     @property
     def user_id(self):
-        return self._data.get("by_username", {}).get("id")
+        return self._data.get("by_id", {}).get("id", self.known_user_id)
 
     @property
     def user_id_fast(self):
@@ -320,7 +495,7 @@ class DuolingoUserData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('User not found')
 
-        result = get.json()
+        result = self._json(get)
         for user in result.get("users", []):
             user_username = user.get("username")
             if user_username is not None and user_username.lower() == self.username.lower():
@@ -338,31 +513,9 @@ class DuolingoUserData(DuolingoBase):
         
 
     @property
-    def courses(self) -> list[dict]:
+    def courses(self) -> list[Course]:
         try:
-            output = []
-            for course in self._data.get("by_id", {}).get("courses", []):
-                if not all(k in course.keys() for k in ["title", "learningLanguage", "xp", "fromLanguage", "id"]) and not("id" in course.keys() and course["id"] in ("MUSIC_MT", "CHESS_CH", "MATH_BT")):
-                    continue
-                if course["id"] in ("MUSIC_MT", "CHESS_CH", "MATH_BT"):
-                    output.append({
-                        "name": str(course["subject"]).capitalize(),
-                        "language": course["topic"],
-                        "from": course["fromLanguage"],
-                        "xp": course["xp"],
-                        "id": course["id"],
-                        "score": course.get("cefrScore"),
-                    })
-                else:
-                    output.append({
-                        "name": course["title"],
-                        "language": course["learningLanguage"],
-                        "from": course["fromLanguage"],
-                        "xp": course["xp"],
-                        "id": course["id"],
-                        "score": course.get("cefrScore"),
-                    })
-            return output
+            return self._courses.get(self._data.get("by_id", {}).get("courses", []), course_records, "id")
         except:
             return []
 
@@ -436,9 +589,13 @@ class DuolingoUserData(DuolingoBase):
                 "length": -1,
             }
         
+    @property
+    def xp_summaries(self) -> list[dict]:
+        return self._data.get("by_id", {}).get("xp_summaries", {}).get("summaries", [])
+
     def lessons_on(self, midnight:datetime) -> list[dict]:
         try:
-            xp_days = self._data.get("by_id", {}).get("xp_summaries", {}).get("summaries", [])
+            xp_days = self.xp_summaries
             next_midnight = midnight + timedelta(days=1)
 
             midnight_timestamp = midnight.timestamp()
@@ -597,25 +754,157 @@ class DuolingoUserData(DuolingoBase):
         except:
             return []
 
+class CohortRankings:
+    """
+    Rankings of one league cohort, parsed once and shared by every tracked member of it.
+    """
+    __slots__ = ("cohort", "ranking", "positions")
+
+    def __init__(self, cohort: dict, previous: "CohortRankings | None" = None):
+        """
+        :param previous: Rankings of the last fetch, whose rows are reused for the players who did not change.
+        """
+        self.cohort = cohort
+        self.ranking = {}
+        self.positions = {}
+        rows = {row.user_id: row for row in previous.ranking.values()} if previous is not None else {}
+        for pos, player in enumerate(cohort.get("rankings", [])):
+            if all(
+                [
+                    k in player.keys()
+                    for k in ["avatar_url", "display_name", "has_plus", "score", "streak_extended_today", "user_id"]
+                ]
+            ):
+                position = pos + 1
+                row = RankingRow(
+                    display_name=player["display_name"],
+                    score=player["score"],
+                    avatar=player["avatar_url"],
+                    has_plus=player["has_plus"],
+                    extended_today=player["streak_extended_today"],
+                    user_id=player["user_id"],
+                )
+                old = rows.get(row.user_id)
+                self.ranking[f"{position}"] = old if old == row else row
+                self.positions[player["user_id"]] = position
+
+class CohortRegistry:
+    """
+    Leaderboards fetched during the current refresh cycle or in the last ``max_age`` seconds, by cohort id.
+    A tracked user who was in one of these cohorts at the previous fetch reuses it instead of downloading it again.
+    """
+    def __init__(self, max_age: float = 60):
+        self._lock = threading.Lock()
+        self._cohorts: dict[str, tuple[dict, CohortRankings, float]] = {}
+        self.max_age = max_age
+        self.fetched = 0
+        self.reused = 0
+
+    def start_cycle(self):
+        with self._lock:
+            self._cohorts.clear()
+
+    def add(self, data: dict, previous: CohortRankings | None = None) -> CohortRankings | None:
+        cohort = (data.get("active") or {}).get("cohort") or {}
+        if cohort.get("cohort_id") is None:
+            return None
+        rankings = CohortRankings(cohort, previous)
+        with self._lock:
+            self._cohorts[cohort["cohort_id"]] = (data, rankings, time.monotonic())
+            self.fetched += 1
+        return rankings
+
+    def get(self, cohort_id: str | None, user_id) -> tuple[dict, CohortRankings] | None:
+        with self._lock:
+            found = self._cohorts.get(cohort_id)
+            # Users are refreshed on their own schedules, an older fetch of the cohort is not reused
+            if found is None or time.monotonic() - found[2] > self.max_age or user_id not in found[1].positions:
+                return None
+            self.reused += 1
+            return found[0], found[1]
+
 class DuolingoLeaderboardData(DuolingoBase):
-    def __init__(self, username, password=None, jwt=None, user_id=None, *args, **kwargs):
+    def __init__(self, username, password=None, jwt=None, user_id=None, cohorts=None, *args, **kwargs):
         """
         :param username: Username to use for duolingo
         :param password: Password to authenticate as user.
         :param jwt: Duolingo login token. Will be checked and used if it is valid request.
+        :param cohorts: Optional ``CohortRegistry`` shared by the tracked users.
         """
         super().__init__(username, password, jwt, *args, **kwargs)
 
         self.user_id = user_id
+        self.cohorts = cohorts
+        self._rankings: CohortRankings | None = None
+        self.next_fetch: datetime | None = None
 
-    def update(self, *args, **kwargs):
+    def _contest_end(self) -> datetime | None:
+        """End of the active contest as an aware datetime, a time without an offset is taken as UTC."""
+        try:
+            end = datetime.fromisoformat(self._data["active"]["contest"]["contest_end"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return end if end.tzinfo is not None else end.replace(tzinfo=timezone.utc)
+
+    def _plan_next_fetch(self, now: datetime):
+        """
+        Rankings move most at the end of a contest: fetch rarely early in the week and more often as the end comes.
+        """
+        end = self._contest_end()
+        if end is None:
+            self.next_fetch = None
+            return
+        left = end - now
+        if left <= timedelta(0):
+            self.next_fetch = now + LEADERBOARD_ROLLOVER_RETRY
+            return
+        for threshold, interval in LEADERBOARD_POLL_STEPS:
+            if left > threshold:
+                # Never sleep past the rollover, the new tier is picked up on the first update after it
+                self.next_fetch = min(now + interval, end)
+                return
+        self.next_fetch = None
+
+    def update(self, *args, force=False, **kwargs):
+        """
+        :param force: Fetch even when the contest schedule says the rankings can wait.
+        """
         old_data = self._data
+        now = datetime.now(timezone.utc)
+        if not force and self.next_fetch is not None and now < self.next_fetch:
+            return
         try:
-            self._data = {**self._get_data(), "last_update": self._make_latest_update_date()}
+            cohort_id = ((old_data.get("active") or {}).get("cohort") or {}).get("cohort_id")
+            shared = self.cohorts.get(cohort_id, self.user_id) if self.cohorts is not None else None
+            if shared is not None:
+                # Same league as a user fetched this cycle: only the own streak in tier is not part of the cohort
+                data, self._rankings = shared
+                self._data = {**data, "streak_in_tier": old_data.get("streak_in_tier", -1), "last_update": self._make_latest_update_date()}
+                self._plan_next_fetch(now)
+                return
+            data = self._get_data()
+            if self.cohorts is not None:
+                self._rankings = self.cohorts.add(data, self._rankings)
+            self._data = {**data, "last_update": self._make_latest_update_date()}
+            self._plan_next_fetch(now)
         except Exception as err:
             _LOGGER.warning("Failed to update leaderboard data for %s: %s", self.username, err, exc_info=True)
             self._data = {**old_data, "last_update": self._make_latest_update_date()}
 
+    def dump(self) -> dict:
+        active = self._data.get("active") or {}
+        cohort = active.get("cohort") or {}
+        return {
+            **_pick(self._data, ("tier", "streak_in_tier", "last_update")),
+            "active": {
+                "contest": active.get("contest", {}),
+                "cohort": {
+                    **{key: value for key, value in cohort.items() if key != "rankings"},
+                    "rankings": [_pick(player, RANKING_SNAPSHOT_FIELDS) for player in cohort.get("rankings", [])],
+                },
+            } if active else None,
+        }
+
     def _get_data(self):
         """
         Get user's leadorboard data from ``https://duolingo-leaderboards-prod.duolingo.com/leaderboards/7d9f5dd1-8423-491a-91f2-2532052038ce/users/<user_id>``.
@@ -624,30 +913,13 @@ class DuolingoLeaderboardData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
 
     def _get_ranking_and_position(self, cohort:dict) -> tuple[dict, int]:
-        output = {}
-        user_position = -1
-        for pos, player in enumerate(cohort.get("rankings", [])):
-            if all(
-                [
-                    k in player.keys()
-                    for k in ["avatar_url", "display_name", "has_plus", "score", "streak_extended_today", "user_id"]
-                ]
-            ):
-                position = pos + 1
-                output[f"{position}"] = {
-                        "display_name": player["display_name"],
-                        "score": player["score"],
-                        "avatar": player["avatar_url"],
-                        "has_plus": player["has_plus"],
-                        "extended_today": player["streak_extended_today"],
-                        "user_id": player["user_id"],
-                    }
-                if player["user_id"] == self.user_id:
-                    user_position = pos + 1
-        return output, user_position
+        rankings = self._rankings
+        if rankings is None or rankings.cohort is not cohort:
+            rankings = self._rankings = CohortRankings(cohort, rankings)
+        return rankings.ranking, rankings.positions.get(self.user_id, -1)
         
     @property
     def start(self) -> str:
@@ -712,15 +984,28 @@ class DuolingoFriendsData(DuolingoBase):
         super().__init__(username, password, jwt, *args, **kwargs)
 
         self.user_id = user_id
+        self._followers = RecordCache()
+        self._following = RecordCache()
+
+    @staticmethod
+    def _slim(data: dict) -> dict:
+        return {
+            key: {"users": [_pick(user, FRIEND_SNAPSHOT_FIELDS) for user in data.get(key, {}).get("users", [])]}
+            for key in ("followers", "following")
+        }
 
     def update(self, *args, **kwargs):
         old_data = self._data
         try:
-            self._data = {**self._get_data(), "last_update": self._make_latest_update_date()}
+            # Only the fields of the records are kept, the profile has many more per user
+            self._data = {**self._slim(self._get_data()), "last_update": self._make_latest_update_date()}
         except Exception as err:
             _LOGGER.warning("Failed to update friends data for %s: %s", self.username, err, exc_info=True)
             self._data = {**old_data, "last_update": self._make_latest_update_date()}
 
+    def dump(self) -> dict:
+        return self._slim(self._data) | {"last_update": self._data.get("last_update")}
+
     def _get_data(self, limit=1000):
         """
         Get user's friends data from ``https://friends-prod.duolingo.com/users/<user_id>/profile``.
@@ -729,45 +1014,19 @@ class DuolingoFriendsData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
         
     @property
-    def followers(self):
+    def followers(self) -> list[Friend]:
         try:
-            users = self._data.get("followers", {}).get("users", [])
-            return [
-                {
-                    "username": user["username"],
-                    "display_name": user["displayName"],
-                    "avatar": f'{user["picture"]}/large',
-                    "subscription": user["hasSubscription"],
-                    "xp": user["totalXp"],
-                    "user_id": user["userId"],
-                }
-                for user in users if all(
-                    k in user.keys() for k in ["displayName", "hasSubscription", "totalXp", "userId", "username", "picture"]
-                )
-            ]
+            return self._followers.get(self._data.get("followers", {}).get("users", []), friend_records, "user_id")
         except:
             return []
         
     @property
-    def following(self):
+    def following(self) -> list[Friend]:
         try:
-            users = self._data.get("following", {}).get("users", [])
-            return [
-                {
-                    "username": user["username"],
-                    "display_name": user["displayName"],
-                    "avatar": f'{user["picture"]}/large',
-                    "subscription": user["hasSubscription"],
-                    "xp": user["totalXp"],
-                    "user_id": user["userId"],
-                }
-                for user in users if all(
-                    k in user.keys() for k in ["displayName", "hasSubscription", "totalXp", "userId", "username", "picture"]
-                )
-            ]
+            return self._following.get(self._data.get("following", {}).get("users", []), friend_records, "user_id")
         except:
             return []
 
@@ -806,7 +1065,7 @@ class DuolingoQuestsData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
 
     def _get_data_schema(self):
         """
@@ -820,7 +1079,7 @@ class DuolingoQuestsData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('Schema not found')
         else:
-            return get.json()
+            return self._json(get)
 
     @property
     def monthly(self):
@@ -908,6 +1167,7 @@ class DuolingoFriendStreaksData(DuolingoBase):
         super().__init__(username, password, jwt, *args, **kwargs)
 
         self.user_id = user_id
+        self._confirmed = RecordCache()
 
     def update(self, *args, **kwargs):
         old_data = self._data
@@ -927,7 +1187,7 @@ class DuolingoFriendStreaksData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
 
     def _get_data_matches(self, matches:list):
         """
@@ -937,84 +1197,127 @@ class DuolingoFriendStreaksData(DuolingoBase):
         if get.status_code == 404:
             raise Exception('User not found')
         else:
-            return get.json()
+            return self._json(get)
+
+    def _streak_records(self, data: dict) -> list[FriendStreak]:
+        matches = {match.get("matchId"): match for match in data.get("matches", {}).get("friendsStreak", []) if match.get("matchId") is not None}
+        output = []
+        for confirmed_match in data.get("friend_streak", {}).get("friendsStreak", {}).get("confirmedMatches", []):
+            match_id = confirmed_match.get("matchId")
+            detailed_match = matches.get(match_id)
+            if match_id is None or detailed_match is None:
+                continue
+            info = (detailed_match.get("streaks") or [{}])[0]
+            own, friend = None, None
+            for user_in_match in confirmed_match.get("usersInMatch", []):
+                if user_in_match.get("userId") == self.user_id:
+                    own = user_in_match
+                else:
+                    friend = user_in_match
+            if own is None or friend is None:
+                continue
+            output.append(FriendStreak(
+                name=own.get("name", "?"),
+                picture=own.get("picture", DEFAULT_AVATAR),
+                user_id=own.get("userId"),
+                length=info.get("streakLength", 0),
+                start=info.get("startDate", "1900-01-01"),
+                end=info.get("endDate", "1900-01-01"),
+                extended=info.get("extended", False),
+                id=match_id,
+                friend=StreakFriend(
+                    name=friend.get("name", "?"),
+                    picture=friend.get("picture", DEFAULT_AVATAR),
+                    user_id=friend.get("userId"),
+                    match_id=match_id,
+                ),
+            ))
+        return output
 
     @property
-    def confirmed(self) -> list[dict]:
+    def confirmed(self) -> list[FriendStreak]:
         try:
-            confirmed_matches = self._data.get("friend_streak", {}).get("friendsStreak", {}).get("confirmedMatches", [])
-            matches = self._data.get("matches", {}).get("friendsStreak", [])
-            output = []
-            for confirmed_match in confirmed_matches:
-                output_row:dict = {}
-                for user_in_match in confirmed_match.get("usersInMatch", []):
-                    user_in_match_id = user_in_match.get("userId")
-                    detailed_match = None
-                    for match in matches:
-                        detailed_match_id = match.get("matchId")
-                        if detailed_match_id == confirmed_match.get("matchId") and detailed_match_id is not None:
-                            detailed_match = match
-                            break
-                    if detailed_match is None:
-                        continue
-                    detailed_match_info = detailed_match.get("streaks", [
-                            {
-                                "startDate": "1900-01-01",
-                                "endDate": "1900-01-01",
-                                "streakLength": 0,
-                                "extended": False,
-                            }
-                        ])[0]
-                    if confirmed_match.get("matchId") is None:
-                        continue
-                    
-                    if user_in_match_id == self.user_id:
-                        output_row = {
-                            "name": user_in_match.get("name", "?"),
-                            "avatar": f'{user_in_match.get("picture", "https://simg-ssl.duolingo.com/avatar/default_2")}/large',
-                            "user_id": user_in_match_id,
-                            "length": detailed_match_info.get("streakLength", 0),
-                            "start": detailed_match_info.get("startDate", "1900-01-01"),
-                            "end": detailed_match_info.get("endDate", "1900-01-01"),
-                            "extended": detailed_match_info.get("extended", False),
-                            "id": confirmed_match.get("matchId"),
-                            **output_row
-                        }
-                    else:
-                        output_row["friend"] = {
-                            "name": user_in_match.get("name", "?"),
-                            "avatar": f'{user_in_match.get("picture", "https://simg-ssl.duolingo.com/avatar/default_2")}/large',
-                            "user_id": user_in_match_id,
-                            "match_id": confirmed_match.get("matchId"),
-                        }
-                if len(output_row.keys()) < 1:
-                    continue
-                output.append(output_row)
-                        
-            return output
+            return self._confirmed.get(self._data, self._streak_records, "id")
         except:
             return []
 
 class Duolingo(Base):
-    def __init__(self, username, password=None, jwt=None, *args, **kwargs):
+    # ``UserXpHistory`` of the user, kept and set by the coordinator
+    xp_history = None
+
+    def __init__(self, username, password=None, jwt=None, user_id=None, cohorts=None, *args, **kwargs):
         """
         :param username: Username to use for duolingo
         :param password: Password to authenticate as user.
         :param jwt: Duolingo login token. Will be checked and used if it is valid request.
+        :param user_id: Already known user id (e.g. from a snapshot). No request is made until the first update, which checks the login.
+        :param cohorts: Optional ``CohortRegistry`` shared with the other tracked users.
         """
         super().__init__(username, password, jwt, *args, **kwargs)
 
-        if password or jwt:
-            self._login()
-        else:
+        if not (password or jwt):
             raise DuolingoException("Password, jwt, or session_file must be specified in order to authenticate.")
-        
-        self.user_data = DuolingoUserData(self.username, self.password, self.jwt)
-        user_id = self.user_data.user_id_fast
-        self.leaderboard_data = DuolingoLeaderboardData(self.username, self.password, self.jwt, user_id=user_id)
-        self.friends_data = DuolingoFriendsData(self.username, self.password, self.jwt, user_id=user_id)
-        self.friend_streaks_data = DuolingoFriendStreaksData(self.username, self.password, self.jwt, user_id=user_id)
-        self.quest_data = DuolingoQuestsData(self.username, self.password, self.jwt, user_id=user_id)
+        self._logged_in = False
+        if user_id is None:
+            self._login()
+            self._logged_in = True
+
+        self.user_data = DuolingoUserData(self.username, self.password, self.jwt, user_id, cassette=self.cassette, cache=self.cache)
+        self.user_id = user_id if user_id is not None else self.user_data.user_id_fast
+        self.user_data.known_user_id = self.user_id
+        self.cohorts = cohorts
+        self._clients = {}
+
+    def _client(self, key, cls):
+        """
+        Create the sub-client on first use, so categories which are never fetched never get a client.
+        """
+        client = self._clients.get(key)
+        if client is None:
+            client = cls(self.username, self.password, self.jwt, user_id=self.user_id, cohorts=self.cohorts, cassette=self.cassette, cache=self.cache)
+            self._clients[key] = client
+        return client
+
+    def get(self, key, default=None):
+        """
+        Unlike an attribute read, ``get`` does not create a missing sub-client: entities and the generated sensors
+        read every category, a category which was never fetched or restored is ``default``.
+        """
+        if key in CATEGORY_KEYS.values() and key != "user_data" and key not in self._clients:
+            return default
+        return super().get(key, default)
+
+    @property
+    def leaderboard_data(self) -> DuolingoLeaderboardData:
+        return self._client("leaderboard_data", DuolingoLeaderboardData)
+
+    @property
+    def friends_data(self) -> DuolingoFriendsData:
+        return self._client("friends_data", DuolingoFriendsData)
+
+    @property
+    def friend_streaks_data(self) -> DuolingoFriendStreaksData:
+        return self._client("friend_streaks_data", DuolingoFriendStreaksData)
+
+    @property
+    def quest_data(self) -> DuolingoQuestsData:
+        return self._client("quest_data", DuolingoQuestsData)
+
+    def dump(self) -> dict:
+        """
+        Compact snapshot of every fetched category, restorable with ``restore``.
+        """
+        return {
+            "user_id": self.user_id,
+            "user_data": self.user_data.dump(),
+            **{key: client.dump() for key, client in self._clients.items()},
+        }
+
+    def restore(self, snapshot: dict):
+        self.user_data.load(snapshot.get("user_data"))
+        for key in CATEGORY_KEYS.values():
+            if key != "user_data" and snapshot.get(key):
+                getattr(self, key).load(snapshot[key])
 
     def _login(self):
         """
@@ -1035,11 +1338,22 @@ class Duolingo(Base):
 
         raise DuolingoException("Login failed")
 
-    def update(self, *args, **kwargs):
-        self.user_data.update()
-        self.leaderboard_data.update()
-        self.friends_data.update()
-        self.friend_streaks_data.update()
-        self.quest_data.update()
+    def update(self, categories=None, force=False, *args, **kwargs):
+        """
+        :param categories: Categories (see ``CATEGORY_KEYS``) to fetch. All of them when None.
+        :param force: Also fetch what is only fetched on a schedule, like the leaderboard, and send every request
+                      instead of answering it from the shared cache.
+        """
+        if not self._logged_in:
+            self._login()
+            self._logged_in = True
+
+        # Asked for now: responses cached by a poll a moment ago would hide what just changed
+        with bypass() if force else nullcontext():
+            for category, key in CATEGORY_KEYS.items():
+                if categories is not None and category not in categories:
+                    continue
+                with span(f"{key}.update"):
+                    getattr(self, key).update(force=force)
 
         return self
\ No newline at end of file
@@ -50,13 +50,24 @@ import logging
 _LOGGER = logging.getLogger(__name__)
 
 class DuolingoAPI():
-    def __init__(self, username=None, jwt=None, internal=30):
+    def __init__(self, username=None, jwt=None, internal=30, cassette=None, snapshot=None, cache=None, cohorts=None):
         self.username = username
         self.interval = internal
-        try:
-            self.lingo = Duolingo(username=username, jwt=jwt)
-        except:
-            raise FailedToLogin
+        self.lingo = None
+        self.restored = False
+        if snapshot and snapshot.get("user_id") is not None:
+            try:
+                self.lingo = Duolingo(username=username, jwt=jwt, user_id=snapshot["user_id"], cohorts=cohorts, cassette=cassette, cache=cache)
+                self.lingo.restore(snapshot)
+                self.restored = True
+            except Exception as err:
+                _LOGGER.debug(f'Ignoring unusable snapshot of {username}: {err}')
+                self.lingo = None
+        if self.lingo is None:
+            try:
+                self.lingo = Duolingo(username=username, jwt=jwt, cohorts=cohorts, cassette=cassette, cache=cache)
+            except:
+                raise FailedToLogin
 
     def get_username(self):
         return self.username
@@ -64,8 +75,14 @@ class DuolingoAPI():
     def get_interval(self):
         return self.interval
 
-    def update(self):
-        return self.lingo.update()
+    def update(self, categories=None, force=False):
+        return self.lingo.update(categories, force)
+
+    def get_data(self):
+        return self.lingo
+
+    def dump(self):
+        return self.lingo.dump()
 
 class FailedToLogin(Exception):
     "Raised when the Duolingo user fail to Log-in"
@@ -8,7 +8,7 @@ from homeassistant.core import HomeAssistant
 from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
 from homeassistant.const import EntityCategory
 
-from .const import DOMAIN, functionType
+from .const import DOMAIN, ATTR_RESTORED_FROM, ATTR_FOLLOWING, ATTR_RANKING, CATEGORY_LEADERBOARD, CATEGORY_USER, KEY_CATEGORIES, functionType
 from .coordinator import DuolingoDataCoordinator
 from .duolingo_api import DataObject
 
@@ -20,6 +20,22 @@ def sanitize_dict(fields):
     """Ensure all field keys are strings."""
     return {str(k): v for k, v in fields.items()}
 
+def with_freshness(coordinator: DuolingoDataCoordinator, attrs: Dict[str, Any], username: str | None = None) -> Dict[str, Any]:
+    """Mark values of ``username`` (of any user when None) which still come from the snapshot of a previous run."""
+    restored_from = coordinator.restored_from(username)
+    if restored_from is not None:
+        attrs[ATTR_RESTORED_FROM] = restored_from.isoformat()
+    return attrs
+
+def sensor_unique_id(jwt: str, username: str, name: str) -> str:
+    return f'{jwt}_Duolingo_{username}_{name}'
+
+def leaderboard_unique_id(jwt: str, name: str) -> str:
+    return f'{jwt}_Duolingo_Leaderboard_{name}'
+
+def device_identifier(jwt: str, username: str) -> tuple[str, str]:
+    return (DOMAIN, f'{jwt}_Duolingo_{username}')
+
 class DuolingoEntityDescription():
     def __init__(
         self,
@@ -30,7 +46,8 @@ class DuolingoEntityDescription():
         icon: str | tuple | None = None,
         icon_switch: str | Callable | None = None,
         unit: str | None = None,
-        entity_category: EntityCategory | None = None
+        entity_category: EntityCategory | None = None,
+        compact_attrs: Callable | None = None
     ):
         self.key = key
         self.name = name
@@ -40,18 +57,30 @@ class DuolingoEntityDescription():
         self.icon_switch = icon_switch
         self.unit = unit
         self.entity_category = entity_category
+        # Attributes used instead of ``attrs`` in the compact attribute mode
+        self.compact_attrs = compact_attrs
 
 class DuolingoSensor(CoordinatorEntity[DuolingoDataCoordinator], SensorEntity):
     def __init__(self, coordinator: DuolingoDataCoordinator, jwt: str, username: str, description: DuolingoEntityDescription):
-        super().__init__(coordinator)
+        # Only updated when this user is refreshed
+        super().__init__(coordinator, context=username)
         self._username = username
         self._jwt = jwt
         self._description = description
         self.entity_id = f'sensor.{self.sanitize_text(username.lower()).lstrip("_")}_duolingo_{self.sanitize_text(description.name.lower()).rstrip("_")}'
         self._attr_entity_category = description.entity_category
+        self._attrs_spec = description.attrs
         self._state = None
         self._attrs = {}
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_add_consumer(self._username, KEY_CATEGORIES[self._description.key]))
+
+    @property
+    def available(self) -> bool:
+        return self.coordinator.user_available(self._username)
+
     def _get_user_data(self) -> DataObject:
         return self.coordinator.data.get(self._username)
         return DataObject({**self.coordinator.data[self._username]}) if self.coordinator.data.get(self._username) else DataObject()
@@ -64,7 +93,7 @@ class DuolingoSensor(CoordinatorEntity[DuolingoDataCoordinator], SensorEntity):
     @property
     def unique_id(self) -> str:
         """Return the unique ID of the sensor."""
-        return f'{self._jwt}_Duolingo_{self._username}_{self._description.name}'
+        return sensor_unique_id(self._jwt, self._username, self._description.name)
 
     @property
     def icon(self):
@@ -94,7 +123,7 @@ class DuolingoSensor(CoordinatorEntity[DuolingoDataCoordinator], SensorEntity):
             "name": self._username,
             "manufacturer": "Duolingo",
             "model": "Scraper",
-            "identifiers": {(DOMAIN, f'{self._jwt}_Duolingo_{self._username}')},
+            "identifiers": {device_identifier(self._jwt, self._username)},
             "configuration_url": self._attrs.get("entity_picture"),
         }
 
@@ -121,7 +150,7 @@ class DuolingoSensor(CoordinatorEntity[DuolingoDataCoordinator], SensorEntity):
         try:
             user_data = self._get_user_data()
             if user_data:
-                attrs = self._description.attrs
+                attrs = self._attrs_spec
                 sensor_category = user_data.get(self._description.key)
                 if sensor_category:
                     if type(attrs) == str:
@@ -153,7 +182,7 @@ class DuolingoSensor(CoordinatorEntity[DuolingoDataCoordinator], SensorEntity):
     @property
     def extra_state_attributes(self) -> Dict[str, Any] | None:
         self.update_attributes()
-        return sanitize_dict(self._attrs)
+        return with_freshness(self.coordinator, sanitize_dict(self._attrs), self._username)
 
     
     @staticmethod
@@ -171,6 +200,23 @@ class DuolingoSensor(CoordinatorEntity[DuolingoDataCoordinator], SensorEntity):
 
 
 
+class DuolingoCompactSensor(DuolingoSensor):
+    """
+    Sensor using the compact attributes of its description. The full lists stay in the state machine,
+    but are not written to the recorder on every change.
+    """
+    _unrecorded_attributes = frozenset({ATTR_FOLLOWING, ATTR_RANKING})
+
+    def __init__(self, coordinator: DuolingoDataCoordinator, jwt: str, username: str, description: DuolingoEntityDescription):
+        super().__init__(coordinator, jwt, username, description)
+        self._attrs_spec = description.compact_attrs
+
+
+def sensor_class(description: DuolingoEntityDescription, compact: bool) -> type[DuolingoSensor]:
+    return DuolingoCompactSensor if compact and description.compact_attrs is not None else DuolingoSensor
+
+
+
 class DuolingoLeaderboardSensor(CoordinatorEntity[DuolingoDataCoordinator], SensorEntity):
     def __init__(self, coordinator: DuolingoDataCoordinator, jwt: str, usernames: list, description: DuolingoEntityDescription):
         super().__init__(coordinator)
@@ -183,6 +229,16 @@ class DuolingoLeaderboardSensor(CoordinatorEntity[DuolingoDataCoordinator], Sens
         self._attrs = {}
         self._data = []
 
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        for username in self._usernames:
+            self.async_on_remove(self.coordinator.async_add_consumer(username, CATEGORY_USER))
+            self.async_on_remove(self.coordinator.async_add_consumer(username, CATEGORY_LEADERBOARD))
+
+    @property
+    def available(self) -> bool:
+        return any(self.coordinator.user_available(username) for username in self._usernames)
+
     def _get_users_data(self) -> list:
         return [{"data": self.coordinator.data.get(username), "username": username} for username in self._usernames]
         return [DataObject({**self.coordinator.data[username], "username": username}) if self.coordinator.data.get(username) else DataObject() for username in self._usernames]
@@ -195,7 +251,7 @@ class DuolingoLeaderboardSensor(CoordinatorEntity[DuolingoDataCoordinator], Sens
     @property
     def unique_id(self) -> str:
         """Return the unique ID of the sensor."""
-        return f'{self._jwt}_Duolingo_Leaderboard_{self._description.name}'
+        return leaderboard_unique_id(self._jwt, self._description.name)
 
     @property
     def icon(self):
@@ -212,7 +268,7 @@ class DuolingoLeaderboardSensor(CoordinatorEntity[DuolingoDataCoordinator], Sens
             "name": "Leaderboard",
             "manufacturer": "Duolingo",
             "model": "Scraper",
-            "identifiers": {(DOMAIN, f'{self._jwt}_Duolingo_Leaderboard')},
+            "identifiers": {device_identifier(self._jwt, "Leaderboard")},
         }
 
     def update(self):
@@ -255,4 +311,4 @@ class DuolingoLeaderboardSensor(CoordinatorEntity[DuolingoDataCoordinator], Sens
     @property
     def extra_state_attributes(self) -> Dict[str, Any] | None:
         self.update()
-        return sanitize_dict(self._attrs)
\ No newline at end of file
+        return with_freshness(self.coordinator, sanitize_dict(self._attrs))
\ No newline at end of file
@@ -0,0 +1,77 @@
+import asyncio, threading, time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant
+
+# Wait times kept for the percentiles in the diagnostics
+WAIT_SAMPLES = 200
+
+
+class DuolingoExecutor:
+    """
+    Bounded thread pool running the blocking Duolingo requests of every config entry, so a large refresh
+    queues here instead of holding the threads of the shared Home Assistant executor.
+
+    Counts the jobs waiting for a thread and how long they waited.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duolingo")
+        self._lock = threading.Lock()
+        self._waits: deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.queued = 0
+        self.running = 0
+        self.max_queued = 0
+        self.completed = 0
+
+    def _run(self, submitted: float, func: Callable, args: tuple) -> Any:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self._waits.append(time.monotonic() - submitted)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _done(self, future: Future):
+        # A job cancelled before it started (by ``shutdown`` or its caller giving up) never left the queue in ``_run``
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def async_run(self, hass: HomeAssistant, func: Callable, *args) -> Any:
+        """Run ``func(*args)`` on the pool, the counterpart of ``hass.async_add_executor_job``."""
+        with self._lock:
+            future = self._pool.submit(self._run, time.monotonic(), func, args)
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future, loop=hass.loop)
+
+    def shutdown(self, wait: bool = True):
+        """Drop the queued jobs and, with ``wait``, block until the running ones are done."""
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def as_dict(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits)
+            stats = {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+            }
+        if waits:
+            stats["wait_ms"] = {
+                "median": round(waits[len(waits) // 2] * 1000, 1),
+                "p95": round(waits[min(int(len(waits) * 0.95), len(waits) - 1)] * 1000, 1),
+                "max": round(waits[-1] * 1000, 1),
+            }
+        return stats
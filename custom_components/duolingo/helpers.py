@@ -1,5 +1,11 @@
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import Event, HomeAssistant, callback
+from .cache import SharedCache
+from .const import DOMAIN, SHARED_CACHE, SHARED_CACHE_TTL, SHARED_EXECUTOR, SHARED_EXECUTOR_STOP, EXECUTOR_WORKERS, SHARED_STAGGER
+from .duolingo import CohortRegistry
 from .duolingo_api import DuolingoAPI
+from .executor import DuolingoExecutor
+from .scheduler import RefreshStagger
 from typing import Any, Dict
 import re
 
@@ -9,12 +15,15 @@ _LOGGER = logging.getLogger(__name__)
 def setup_client(
     usernames: list,
     jwt: str,
-    interval: int = 30
+    interval: int = 30,
+    snapshots: dict | None = None,
+    cache: SharedCache | None = None,
+    cohorts: CohortRegistry | None = None
 ) -> DuolingoAPI:
     clients = []
     for username in usernames:
         try:
-            client = DuolingoAPI(username, jwt, interval)
+            client = DuolingoAPI(username, jwt, interval, snapshot=(snapshots or {}).get(username), cache=cache, cohorts=cohorts)
             clients.append(client)
         except:
             _LOGGER.warn(f'There was error during initializing {username} user.')
@@ -22,6 +31,32 @@ def setup_client(
     return clients
 
 
+def get_shared_cache(hass: HomeAssistant) -> SharedCache:
+    """Response cache shared by every Duolingo config entry."""
+    return hass.data.setdefault(DOMAIN, {}).setdefault(SHARED_CACHE, SharedCache(SHARED_CACHE_TTL))
+
+
+def get_shared_executor(hass: HomeAssistant) -> DuolingoExecutor:
+    """Thread pool running the blocking requests of every Duolingo config entry."""
+    data = hass.data.setdefault(DOMAIN, {})
+    if SHARED_EXECUTOR not in data:
+        executor = data[SHARED_EXECUTOR] = DuolingoExecutor(EXECUTOR_WORKERS)
+
+        @callback
+        def stop(_event: Event) -> None:
+            # Do not wait for the running requests, the threads must not hold up the shutdown of Home Assistant
+            data.pop(SHARED_EXECUTOR_STOP, None)
+            executor.shutdown(wait=False)
+
+        data[SHARED_EXECUTOR_STOP] = hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, stop)
+    return data[SHARED_EXECUTOR]
+
+
+def get_shared_stagger(hass: HomeAssistant) -> RefreshStagger:
+    """Refresh phases of the users of every Duolingo config entry."""
+    return hass.data.setdefault(DOMAIN, {}).setdefault(SHARED_STAGGER, RefreshStagger())
+
+
 def convert_objects(data) -> Dict[str, Any]:
     if type(data) == dict:
         obj = {}
@@ -0,0 +1,237 @@
+from array import array
+from datetime import date, datetime
+from typing import Any
+
+
+class DailyXp:
+    """
+    Ring buffer of the XP gained per day over the last ``capacity`` days.
+
+    Only running totals are stored: slot ``day % capacity`` holds the XP gained from the first recorded day up to
+    ``day``. The sum over any window is then the difference of two slots. Changing a day only touches the slots
+    from that day to the last recorded one, which is usually the same day.
+    """
+    __slots__ = ("capacity", "first_day", "last_day", "dirty_from", "_base", "_totals", "_best")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.first_day: int | None = None
+        self.last_day: int | None = None
+        # First day changed since ``clean`` was last called
+        self.dirty_from: int | None = None
+        # Running total before the first day, kept when old days are dropped so the totals never go back
+        self._base = 0
+        self._totals = array("q", bytes(8 * capacity))
+        self._best: tuple[int, int] | None = None
+
+    def _total(self, day: int) -> int:
+        if self.first_day is None or day < self.first_day:
+            return self._base
+        return self._totals[min(day, self.last_day) % self.capacity]
+
+    def running_total(self, day: int) -> int:
+        """XP gained up to and including ``day``, counted from the first day ever recorded."""
+        return self._total(day)
+
+    def _dirty(self, day: int):
+        if self.dirty_from is None or day < self.dirty_from:
+            self.dirty_from = day
+
+    def clean(self):
+        self.dirty_from = None
+
+    def oldest(self) -> int:
+        return max(self.first_day, self.last_day - self.capacity + 2)
+
+    def value(self, day: int) -> int:
+        if self.first_day is None or day < self.oldest() or day > self.last_day:
+            return 0
+        return self._total(day) - self._total(day - 1)
+
+    def total(self, first: int, last: int) -> int:
+        """XP gained from day ``first`` to day ``last``, both included."""
+        if self.first_day is None:
+            return 0
+        first = max(first, self.oldest())
+        if first > last:
+            return 0
+        return self._total(last) - self._total(first - 1)
+
+    def _advance(self, day: int):
+        if self.first_day is None:
+            self.first_day = self.last_day = day
+            self._totals[day % self.capacity] = self._base
+            self._dirty(day)
+            return
+        carried = self._totals[self.last_day % self.capacity]
+        for next_day in range(max(self.last_day + 1, day - self.capacity + 1), day + 1):
+            self._totals[next_day % self.capacity] = carried
+        self._dirty(self.last_day + 1)
+        self.last_day = day
+        if self._best is not None and self._best[1] < self.oldest():
+            self._best = None
+
+    def add(self, day: int, xp: int):
+        if self.last_day is None or day > self.last_day:
+            self._advance(day)
+        if day < self.oldest() or not xp:
+            return
+        for changed in range(day, self.last_day + 1):
+            self._totals[changed % self.capacity] += xp
+        self._dirty(day)
+        if self._best is not None:
+            if self._best[1] == day and xp < 0:
+                self._best = None
+            elif self.value(day) > self._best[0]:
+                self._best = (self.value(day), day)
+
+    def set(self, day: int, xp: int):
+        self.add(day, xp - self.value(day) if self.last_day is not None and day <= self.last_day else xp)
+
+    def best(self) -> tuple[int, int] | None:
+        """XP and day of the best day still in the buffer."""
+        if self._best is None and self.first_day is not None:
+            # Only needed after the best day left the buffer or went down
+            self._best = max(((self.value(day), day) for day in range(self.oldest(), self.last_day + 1)), default=None)
+        return self._best
+
+    def as_dict(self) -> dict[str, Any]:
+        if self.first_day is None:
+            return {}
+        oldest = self.oldest()
+        return {
+            "last_day": self.last_day,
+            "base": self._total(oldest - 1),
+            "dirty_from": self.dirty_from,
+            "values": [self.value(day) for day in range(oldest, self.last_day + 1)],
+        }
+
+    @classmethod
+    def from_dict(cls, capacity: int, data: dict) -> "DailyXp":
+        ring = cls(capacity)
+        ring._base = data.get("base", 0)
+        values = data.get("values") or []
+        first = data.get("last_day", 0) - len(values) + 1
+        for offset, xp in enumerate(values):
+            ring.add(first + offset, xp)
+        ring.dirty_from = data.get("dirty_from", ring.dirty_from)
+        return ring
+
+
+class UserXpHistory:
+    """XP history of one user, in total and per course, with the aggregates read by the sensors."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.daily = DailyXp(capacity)
+        self.courses: dict[str, DailyXp] = {}
+        self.course_names: dict[str, str] = {}
+        self._course_xp: dict[str, int] = {}
+
+    def get(self, key, default=None):
+        try:
+            return getattr(self, key)
+        except Exception:
+            return default
+
+    def record(self, user_data, today: date | None = None):
+        """Take the daily summaries and the course totals of a ``DuolingoUserData``."""
+        today = (today or date.today()).toordinal()
+        known = self.daily.last_day
+        days = []
+        for summary in user_data.get("xp_summaries", []):
+            if "date" not in summary:
+                continue
+            day = datetime.fromtimestamp(int(summary["date"])).toordinal()
+            # Days before the last recorded one are final, except the one which was still open
+            if known is None or day >= known - 1:
+                days.append((day, int(summary.get("gainedXp") or 0)))
+        # Oldest first, so the buffer starts at the oldest day and not at today
+        for day, xp in sorted(days):
+            self.daily.set(day, xp)
+
+        for course in user_data.get("courses", []) or []:
+            course_id, xp = course.get("id"), course.get("xp")
+            if course_id is None or xp is None:
+                continue
+            self.course_names[course_id] = f'{course.get("name")} ({course.get("from")})'
+            previous = self._course_xp.get(course_id)
+            # The first total of a course is only a baseline, the gains are counted from the next update on
+            self.courses.setdefault(course_id, DailyXp(self.capacity)).add(today, max(xp - previous, 0) if previous is not None else 0)
+            self._course_xp[course_id] = xp
+
+    @staticmethod
+    def _today() -> int:
+        return date.today().toordinal()
+
+    @property
+    def total_30_days(self) -> int:
+        today = self._today()
+        return self.daily.total(today - 29, today)
+
+    @property
+    def month_to_date(self) -> int:
+        today = date.today()
+        return self.daily.total(today.replace(day=1).toordinal(), today.toordinal())
+
+    @property
+    def average_7_days(self) -> float:
+        today = self._today()
+        return round(self.daily.total(today - 6, today) / 7, 1)
+
+    @property
+    def best_day(self) -> dict[str, Any]:
+        best = self.daily.best()
+        if best is None:
+            return {"xp": None, "date": None}
+        return {"xp": best[0], "date": date.fromordinal(best[1]).isoformat()}
+
+    @property
+    def courses_30_days(self) -> dict[str, int]:
+        today = self._today()
+        return {self.course_names.get(course_id, course_id): ring.total(today - 29, today) for course_id, ring in self.courses.items()}
+
+    @property
+    def courses_month_to_date(self) -> dict[str, int]:
+        today = date.today()
+        first = today.replace(day=1).toordinal()
+        return {self.course_names.get(course_id, course_id): ring.total(first, today.toordinal()) for course_id, ring in self.courses.items()}
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "daily": self.daily.as_dict(),
+            "courses": {
+                course_id: {"name": self.course_names.get(course_id), "xp": self._course_xp.get(course_id), **ring.as_dict()}
+                for course_id, ring in self.courses.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, capacity: int, data: dict) -> "UserXpHistory":
+        history = cls(capacity)
+        history.daily = DailyXp.from_dict(capacity, data.get("daily") or {})
+        for course_id, course in (data.get("courses") or {}).items():
+            history.courses[course_id] = DailyXp.from_dict(capacity, course)
+            if course.get("name") is not None:
+                history.course_names[course_id] = course["name"]
+            if course.get("xp") is not None:
+                history._course_xp[course_id] = course["xp"]
+        return history
+
+
+class XpHistory:
+    """XP history of every user of a config entry."""
+
+    def __init__(self, capacity: int, data: dict | None = None):
+        self.capacity = capacity
+        self.users: dict[str, UserXpHistory] = {
+            username: UserXpHistory.from_dict(capacity, user) for username, user in ((data or {}).get("users") or {}).items()
+        }
+
+    def user(self, username: str) -> UserXpHistory:
+        if username not in self.users:
+            self.users[username] = UserXpHistory(self.capacity)
+        return self.users[username]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"users": {username: user.as_dict() for username, user in self.users.items()}}
@@ -7,6 +7,9 @@ from homeassistant.helpers.selector import (
     TextSelectorConfig,
     ConstantSelector,
     ConstantSelectorConfig,
+    SelectSelector,
+    SelectSelectorConfig,
+    BooleanSelector,
 )
 from homeassistant.const import (
     CONF_USERNAME,
@@ -15,6 +18,14 @@ from .const import (
     DOMAIN, 
     CONF_USERNAME_LABEL,
     CONF_INTERVAL,
+    CONF_DISABLED_CATEGORIES,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_ADAPTIVE_POLLING,
+    CONF_MIN_INTERVAL,
+    CONF_MAX_INTERVAL,
+    DEFAULT_MIN_INTERVAL,
+    DEFAULT_MAX_INTERVAL,
+    CATEGORY_KEYS,
     )
 
 
@@ -28,12 +39,20 @@ class DuolingoOptionFlow(OptionsFlow):
 
         coordinator = self.hass.data[DOMAIN][self._config_entry.entry_id]
 
-        if user_input is not None:
+        if user_input is not None and user_input.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL) > user_input.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL):
+            errors["base"] = "invalid_interval_range"
+
+        if user_input is not None and not errors:
             # Validate and process user input here
             updated_data = {
                 **self._config_entry.data,
                 CONF_USERNAME: user_input.get(CONF_USERNAME),
                 CONF_INTERVAL: user_input.get(CONF_INTERVAL),
+                CONF_DISABLED_CATEGORIES: user_input.get(CONF_DISABLED_CATEGORIES, []),
+                CONF_COMPACT_ATTRIBUTES: user_input.get(CONF_COMPACT_ATTRIBUTES, False),
+                CONF_ADAPTIVE_POLLING: user_input.get(CONF_ADAPTIVE_POLLING, False),
+                CONF_MIN_INTERVAL: user_input.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL),
+                CONF_MAX_INTERVAL: user_input.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL),
             }
             self.hass.config_entries.async_update_entry(self._config_entry, data=updated_data, minor_version=0, version=1)
 
@@ -43,7 +62,16 @@ class DuolingoOptionFlow(OptionsFlow):
             vol.Optional(CONF_USERNAME + "_label"): ConstantSelector(ConstantSelectorConfig(value=CONF_USERNAME_LABEL)),
             vol.Required(CONF_USERNAME, default=self._config_entry.data.get(CONF_USERNAME, [])): TextSelector(TextSelectorConfig(multiple=True, multiline=False)),
             vol.Required(CONF_INTERVAL, default=self._config_entry.data.get(CONF_INTERVAL, 30)): vol.All(vol.Coerce(int), vol.Range(min=10)),
+            vol.Optional(CONF_DISABLED_CATEGORIES, default=self._config_entry.data.get(CONF_DISABLED_CATEGORIES, [])): SelectSelector(SelectSelectorConfig(options=list(CATEGORY_KEYS), multiple=True, translation_key=CONF_DISABLED_CATEGORIES)),
+            vol.Optional(CONF_COMPACT_ATTRIBUTES, default=self._config_entry.data.get(CONF_COMPACT_ATTRIBUTES, False)): BooleanSelector(),
+            vol.Optional(CONF_ADAPTIVE_POLLING, default=self._config_entry.data.get(CONF_ADAPTIVE_POLLING, False)): BooleanSelector(),
+            vol.Optional(CONF_MIN_INTERVAL, default=self._config_entry.data.get(CONF_MIN_INTERVAL, DEFAULT_MIN_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=5)),
+            vol.Optional(CONF_MAX_INTERVAL, default=self._config_entry.data.get(CONF_MAX_INTERVAL, DEFAULT_MAX_INTERVAL)): vol.All(vol.Coerce(int), vol.Range(min=10)),
         })
 
+        if user_input is not None:
+            # Show the rejected values again instead of the saved ones
+            DUOLINGO_SCHEMA = self.add_suggested_values_to_schema(DUOLINGO_SCHEMA, user_input)
+
         # Display a form to gather user input
         return self.async_show_form(step_id="init", data_schema=DUOLINGO_SCHEMA, errors=errors)
\ No newline at end of file
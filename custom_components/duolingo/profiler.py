@@ -0,0 +1,173 @@
+import cProfile, io, pstats, threading, tracemalloc
+
+
+class _Tracemalloc:
+    """
+    Tracing shared by the profilers of every config entry: started by the first one, stopped by the last one to finish,
+    so a profiler finishing early does not throw away the traces the others still compare against.
+    The peak is reset when the first profiler starts, the report of a later one covers the peak since then.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._started = False
+
+    def acquire(self):
+        with self._lock:
+            if self._users == 0:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                    self._started = True
+                tracemalloc.reset_peak()
+            self._users += 1
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+
+_TRACEMALLOC = _Tracemalloc()
+
+
+class RefreshProfiler:
+    """
+    Profiles the next ``cycles`` refresh cycles of one or more config entries with cProfile and tracemalloc.
+
+    Since Python 3.12 (Home Assistant requires a later one) cProfile hooks ``sys.monitoring`` and records every thread
+    of the process: one profiler is enabled for a whole service call and shared by the entries it profiles, instead of
+    one per unit of work. The report therefore covers everything which ran meanwhile, including the event loop.
+    Only one such tool can be active at a time: cycles which start while another one (e.g. the HA profiler
+    integration) holds it are counted as skipped, not as profiled. After as many skipped cycles as were requested
+    the profiler gives up and reports what it has.
+    """
+
+    def __init__(self, cycles: int = 1, entities: bool = False, top: int = 15):
+        self.cycles = cycles
+        self.entities = entities
+        self.top = top
+        self.completed = 0
+        self.skipped = 0
+        self._profile = cProfile.Profile()
+        # Only held for the counters and to enable or disable the profile, never across a refresh
+        self._lock = threading.Lock()
+        self._enabled = False
+        self._tracing = False
+        self._snapshot = None
+        self._users = 0
+        self._reported = False
+
+    @property
+    def done(self) -> bool:
+        return self.completed >= self.cycles or self.skipped >= self.cycles
+
+    def start(self):
+        _TRACEMALLOC.acquire()
+        self._tracing = True
+        self._snapshot = tracemalloc.take_snapshot()
+        self._enable()
+
+    def _enable(self) -> bool:
+        with self._lock:
+            if not self._enabled and not self._reported:
+                try:
+                    self._profile.enable()
+                except ValueError:
+                    # Another profiler is active
+                    return False
+                self._enabled = True
+            return self._enabled
+
+    def stop(self):
+        """Disable the profile and give up tracing. Safe to call more than once."""
+        with self._lock:
+            if self._enabled:
+                self._profile.disable()
+                self._enabled = False
+            tracing, self._tracing = self._tracing, False
+        if tracing:
+            _TRACEMALLOC.release()
+
+    def attach(self):
+        """Register a config entry using this profiler."""
+        with self._lock:
+            self._users += 1
+
+    def detach(self):
+        """Drop a config entry, e.g. when it unloads. The last one stops the profiler unless a report was claimed."""
+        with self._lock:
+            self._users -= 1
+            orphaned = self._users <= 0 and not self._reported
+        if orphaned:
+            self.stop()
+
+    def begin_cycle(self) -> bool:
+        """Called when a cycle starts, returns whether it is profiled."""
+        return self._enable()
+
+    def end_cycle(self, profiled: bool):
+        with self._lock:
+            if profiled:
+                self.completed += 1
+            else:
+                self.skipped += 1
+
+    def claim_report(self) -> bool:
+        """True for the first entry asking once the cycles are done, which then writes the report."""
+        with self._lock:
+            if self._reported or not self.done:
+                return False
+            self._reported = True
+            return True
+
+    @property
+    def reported(self) -> bool:
+        return self._reported
+
+    def write_report(self, path: str) -> str:
+        """
+        Write the full report to ``<path>.txt`` and the raw stats to ``<path>.prof``. Returns a short summary.
+        """
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            memory = []
+            if self._snapshot is not None:
+                memory = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno")
+        finally:
+            self.stop()
+
+        stream = io.StringIO()
+        stats = pstats.Stats(stream=stream)
+        self._profile.create_stats()
+        if self._profile.stats:
+            stats.add(self._profile)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        stats.dump_stats(f"{path}.prof")
+        stream.write(f"Profiled {self.completed} cycle(s){' including entity state computation' if self.entities else ''}\n")
+        if self.skipped:
+            stream.write(f"Skipped {self.skipped} cycle(s) while another profiler was active\n")
+        stream.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n\n")
+        stats.print_stats()
+        stream.write("Memory growth by line:\n")
+        for diff in memory[:self.top * 4]:
+            stream.write(f"{diff}\n")
+        with open(f"{path}.txt", "w", encoding="utf-8") as report:
+            report.write(stream.getvalue())
+
+        summary = [f"Profiled {self.completed} cycle(s), peak traced memory: {peak / 1024:.1f} KiB"]
+        if self.skipped:
+            summary.append(f"Skipped {self.skipped} cycle(s) while another profiler was active")
+        summary.extend(["", "Top functions by cumulative time:"])
+        for func in stats.fcn_list[:self.top]:
+            _, _, _, cumulative, _ = stats.stats[func]
+            filename, line, name = func
+            summary.append(f"- {cumulative * 1000:.1f} ms `{filename.rsplit('/', 1)[-1]}:{line}({name})`")
+        summary.extend(["", "Top memory growth:"])
+        for diff in memory[:self.top]:
+            frame = diff.traceback[0]
+            summary.append(f"- {diff.size_diff / 1024:+.1f} KiB `{frame.filename.rsplit('/', 1)[-1]}:{frame.lineno}`")
+        summary.extend(["", f"Full report: `{path}.txt`"])
+        return "\n".join(summary)
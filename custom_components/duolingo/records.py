@@ -0,0 +1,154 @@
+import sys
+from collections.abc import Callable, Mapping
+from typing import Any, ClassVar
+
+DEFAULT_AVATAR = "https://simg-ssl.duolingo.com/avatar/default_2"
+
+
+def intern(value):
+    """Share one copy of short values repeated across records (language codes, course names)."""
+    return sys.intern(value) if type(value) is str else value
+
+
+class Record(Mapping):
+    """
+    Base of the slotted, read only records handed to the entities instead of dicts. They read like the dicts they
+    replace (``record["xp"]``, ``record.get("xp")``, ``{**record}``) and compare by content.
+
+    They are deliberately no dataclasses: orjson, which Home Assistant serialises state attributes, the recorder and
+    websocket messages with, would encode a dataclass from its fields. These fall back to ``json_encoder_default``,
+    which calls ``as_dict`` and so writes the keys of the former dicts.
+
+    ``__slots__`` are the constructor arguments, ``_keys`` the keys in the order of the former dicts and ``_renamed``
+    maps keys which are not valid attribute names. Avatars are derived from the picture on access, so no ``/large``
+    copy of every URL is kept.
+    """
+    __slots__ = ()
+    _keys: ClassVar[tuple[str, ...]] = ()
+    _renamed: ClassVar[dict[str, str]] = {}
+
+    def __init__(self, **values: Any):
+        if len(values) != len(self.__slots__):
+            raise TypeError(f"{type(self).__name__} takes the fields {', '.join(self.__slots__)}")
+        set_field = object.__setattr__
+        for name in self.__slots__:
+            set_field(self, name, values[name])
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"{type(self).__name__} is read only")
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._keys:
+            raise KeyError(key)
+        return getattr(self, self._renamed.get(key, key))
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {key: value.as_dict() if isinstance(value, Record) else value for key, value in self.items()}
+
+
+class Friend(Record):
+    __slots__ = ("username", "display_name", "picture", "subscription", "xp", "user_id")
+    _keys = ("username", "display_name", "avatar", "subscription", "xp", "user_id")
+
+    username: str
+    display_name: str
+    picture: str
+    subscription: bool
+    xp: int
+    user_id: int
+
+    @property
+    def avatar(self) -> str:
+        return f"{self.picture}/large"
+
+
+class RankingRow(Record):
+    __slots__ = ("display_name", "score", "avatar", "has_plus", "extended_today", "user_id")
+    _keys = __slots__
+
+    display_name: str
+    score: int
+    avatar: str
+    has_plus: bool
+    extended_today: bool
+    user_id: int
+
+
+class Course(Record):
+    __slots__ = ("name", "language", "from_", "xp", "id", "score")
+    _keys = ("name", "language", "from", "xp", "id", "score")
+    _renamed = {"from": "from_"}
+
+    name: str
+    language: str
+    from_: str
+    xp: int
+    id: str
+    score: int | None
+
+
+class StreakFriend(Record):
+    __slots__ = ("name", "picture", "user_id", "match_id")
+    _keys = ("name", "avatar", "user_id", "match_id")
+
+    name: str
+    picture: str
+    user_id: int
+    match_id: str
+
+    @property
+    def avatar(self) -> str:
+        return f"{self.picture}/large"
+
+
+class FriendStreak(Record):
+    __slots__ = ("name", "picture", "user_id", "length", "start", "end", "extended", "id", "friend")
+    _keys = ("name", "avatar", "user_id", "length", "start", "end", "extended", "id", "friend")
+
+    name: str
+    picture: str
+    user_id: int
+    length: int
+    start: str
+    end: str
+    extended: bool
+    id: str
+    friend: StreakFriend
+
+    @property
+    def avatar(self) -> str:
+        return f"{self.picture}/large"
+
+
+class RecordCache:
+    """
+    Records built from one source list, rebuilt only when the source object changes (i.e. after an update).
+    Records equal to one of the previous build are reused, so an unchanged row stays one object across refreshes.
+    """
+    __slots__ = ("_source", "_records", "_by_key")
+
+    def __init__(self):
+        self._source = None
+        self._records: list = []
+        self._by_key: dict = {}
+
+    def get(self, source, build: Callable[[Any], list[Record]], key: str) -> list:
+        if source is self._source:
+            return self._records
+        previous = self._by_key
+        records = []
+        for record in build(source):
+            old = previous.get(record[key])
+            records.append(old if old == record else record)
+        self._source, self._records = source, records
+        self._by_key = {record[key]: record for record in records}
+        return records
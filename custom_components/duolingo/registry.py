@@ -0,0 +1,69 @@
+import logging
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.const import (
+    CONF_USERNAME,
+    )
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+
+from .const import CONF_JWT
+from .coordinator import DuolingoDataCoordinator
+from .button import button_unique_id
+from .entity import sensor_unique_id, leaderboard_unique_id, device_identifier
+from .sensor import LEADERBOARD_SENSORS, build_descriptions
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def desired_unique_ids(coordinator: DuolingoDataCoordinator, config_entry: ConfigEntry) -> tuple[set[str], set[str]]:
+    """
+    Return the unique ids the platforms will create and the prefixes of users without data.
+
+    Generated sensors of a user whose data could not be fetched are unknown, so everything under
+    that user's prefix is kept until the data is available.
+    """
+    jwt = config_entry.data[CONF_JWT]
+    usernames = config_entry.data[CONF_USERNAME]
+    unique_ids = {button_unique_id(jwt)}
+    unknown_prefixes = set()
+    for username in usernames:
+        user_data = (coordinator.data or {}).get(username)
+        if not user_data:
+            unknown_prefixes.add(sensor_unique_id(jwt, username, ""))
+        for description in build_descriptions(user_data or {}):
+            unique_ids.add(sensor_unique_id(jwt, username, description.name))
+    for description in LEADERBOARD_SENSORS:
+        unique_ids.add(leaderboard_unique_id(jwt, description.name))
+    return unique_ids, unknown_prefixes
+
+
+@callback
+def async_reconcile_entities(hass: HomeAssistant, coordinator: DuolingoDataCoordinator, config_entry: ConfigEntry) -> None:
+    """
+    Remove the registry entries of this config entry which the platforms will no longer create.
+
+    Entries which are still wanted are left untouched, so their customisations survive and the
+    platforms only add what is missing.
+    """
+    jwt = config_entry.data[CONF_JWT]
+    unique_ids, unknown_prefixes = desired_unique_ids(coordinator, config_entry)
+
+    entity_registry = er.async_get(hass)
+    removed = 0
+    for entity in er.async_entries_for_config_entry(entity_registry, config_entry.entry_id):
+        if entity.unique_id in unique_ids or entity.unique_id.startswith(tuple(unknown_prefixes)):
+            continue
+        entity_registry.async_remove(entity.entity_id)
+        removed += 1
+
+    identifiers = {device_identifier(jwt, username) for username in config_entry.data[CONF_USERNAME]}
+    identifiers.add(device_identifier(jwt, "Leaderboard"))
+    device_registry = dr.async_get(hass)
+    for device in dr.async_entries_for_config_entry(device_registry, config_entry.entry_id):
+        if device.identifiers & identifiers:
+            continue
+        device_registry.async_update_device(device.id, remove_config_entry_id=config_entry.entry_id)
+
+    if removed:
+        _LOGGER.debug("Removed %s stale Duolingo entities", removed)
@@ -0,0 +1,145 @@
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+# XP changed this recently: a session is probably going on
+ACTIVE_WINDOW = timedelta(minutes=30)
+# Streak not extended yet and less time than this left until midnight
+RISK_WINDOW = timedelta(hours=3)
+NIGHT_END_HOUR = 6
+# Part of an interval a refresh may run late and still count as on its slot
+SLOT_TOLERANCE = 0.1
+
+
+class _UserPlan:
+    __slots__ = ("total_xp", "changed_at", "interval", "reason", "due")
+
+    def __init__(self):
+        self.total_xp: int | None = None
+        self.changed_at: datetime | None = None
+        self.interval: timedelta | None = None
+        self.reason = "first refresh"
+        self.due: datetime | None = None
+
+
+class PollScheduler:
+    """
+    Polling interval of every user, set after each refresh from what the client already parsed:
+
+        active (XP changed within ``ACTIVE_WINDOW``)         -> ``min_interval``
+        streak at risk (not extended, < ``RISK_WINDOW`` left) -> ``min_interval``
+        streak extended and daily goal met, or night time    -> ``max_interval``
+        otherwise                                            -> ``interval``, doubled for every 2 idle hours
+
+    Times are local, timezone aware datetimes.
+    """
+
+    def __init__(self, interval: timedelta, min_interval: timedelta, max_interval: timedelta):
+        self.min_interval = min(min_interval, max_interval)
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = interval
+        self._plans: dict[str, _UserPlan] = {}
+
+    def _plan(self, username: str) -> _UserPlan:
+        if username not in self._plans:
+            self._plans[username] = _UserPlan()
+        return self._plans[username]
+
+    def observe(self, username: str, user_data, now: datetime) -> timedelta:
+        """Record a refresh of ``username`` and plan the next one."""
+        plan = self._plan(username)
+        total_xp = user_data.get("total_xp", -1)
+        if plan.total_xp is not None and total_xp != plan.total_xp:
+            plan.changed_at = now
+        elif plan.changed_at is None:
+            # Nothing seen yet, count the idle time from the first refresh without taking it for activity
+            plan.changed_at = now - ACTIVE_WINDOW
+        plan.total_xp = total_xp
+
+        interval, plan.reason = self._interval(user_data, now, now - plan.changed_at)
+        plan.interval = max(self.min_interval, min(self.max_interval, interval))
+        plan.due = now + plan.interval
+        return plan.interval
+
+    def _interval(self, user_data, now: datetime, idle: timedelta) -> tuple[timedelta, str]:
+        extended = bool(user_data.get("streak_extended_today", False))
+        xp, xp_goal = user_data.get("xp", -1), user_data.get("xp_goal", -1)
+        next_midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        if idle < ACTIVE_WINDOW:
+            return self.min_interval, "active"
+        if not extended and next_midnight - now < RISK_WINDOW:
+            return self.min_interval, "streak at risk"
+        if extended and (xp_goal <= 0 or xp >= xp_goal):
+            return self.max_interval, "done for today"
+        if now.hour < NIGHT_END_HOUR:
+            return self.max_interval, "night"
+        return self.interval * 2 ** min(int(idle / timedelta(hours=2)), 4), "idle"
+
+    def as_dict(self, labels: dict[str, str]) -> dict[str, Any]:
+        """Plans keyed by the labels (``username -> label``) the rest of the diagnostics use instead of usernames."""
+        return {
+            labels.get(username, "unknown"): {
+                "interval_min": plan.interval.total_seconds() / 60 if plan.interval else None,
+                "reason": plan.reason,
+                "due": plan.due.isoformat() if plan.due else None,
+            }
+            for username, plan in self._plans.items()
+        }
+
+
+class RefreshStagger:
+    """
+    Phase of every tracked user within its interval, shared by all config entries.
+
+    The users are spread evenly in the order of their names, so the phases do not depend on which entry starts
+    first and a user tracked by two entries gets the same slot in both. Each entry still sends its own requests,
+    the shared cache is keyed by token. Phases are counted from the epoch, entries started together do not stay aligned.
+    """
+
+    def __init__(self):
+        self._users: Counter[str] = Counter()
+        self._order: list[str] = []
+
+    def add(self, username: str) -> Callable[[], None]:
+        self._users[username] += 1
+        self._order = sorted(self._users)
+
+        def remove():
+            self._users[username] -= 1
+            if self._users[username] <= 0:
+                del self._users[username]
+                self._order = sorted(self._users)
+
+        return remove
+
+    def phase(self, username: str) -> float:
+        if username not in self._users:
+            return 0.0
+        return self._order.index(username) / len(self._order)
+
+    def delay(
+        self, username: str, interval: timedelta, now: float,
+        shortest: timedelta | None = None, longest: timedelta | None = None,
+    ) -> timedelta:
+        """
+        Time from ``now`` (a timestamp) to the next refresh slot of ``username``: the refresh is moved forward,
+        by less than one interval, to the user's phase. A refresh which runs a little late for its slot
+        (``SLOT_TOLERANCE`` of the interval) keeps the slot one interval later instead of skipping it.
+
+        With bounds (``shortest`` to ``longest``, e.g. those of adaptive polling) a slot beyond ``longest`` is
+        reached by shortening this interval to the slot one interval earlier instead, so clamping the result
+        does not cut off the move to the slot every time.
+        """
+        period = interval.total_seconds()
+        if period <= 0:
+            return interval
+        offset = self.phase(username) * period
+        wait = offset + math.ceil((now + period * (1 - SLOT_TOLERANCE) - offset) / period) * period - now
+        low = shortest.total_seconds() if shortest is not None else 0.0
+        if longest is not None and wait > longest.total_seconds():
+            if wait - period >= low:
+                wait -= period
+            wait = min(wait, longest.total_seconds())
+        return timedelta(seconds=max(wait, low))
@@ -3,9 +3,10 @@ from collections.abc import Callable
 from datetime import datetime, timedelta
 
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
+from homeassistant.helpers import entity_registry as er
 
 from homeassistant.const import (
     CONF_USERNAME,
@@ -15,11 +16,17 @@ from homeassistant.const import (
 from .const import (
     DOMAIN,
     CONF_JWT,
+    CONF_COMPACT_ATTRIBUTES,
+    ATTR_FOLLOWING,
+    ATTR_RANKING,
+    CATEGORY_USER,
+    CATEGORY_LEADERBOARD,
+    KEY_CATEGORIES,
     functionType,
 )
 from .coordinator import DuolingoDataCoordinator
 from .helpers import convert_objects, camel_to_snake
-from .entity import DuolingoSensor, DuolingoLeaderboardSensor, DuolingoEntityDescription
+from .entity import DuolingoSensor, DuolingoLeaderboardSensor, DuolingoEntityDescription, sensor_class
 
 import logging
 _LOGGER = logging.getLogger(__name__)
@@ -78,6 +85,7 @@ SENSORS: list[DuolingoEntityDescription | Callable] = [
         name="Leaderboard",
         state=lambda x: int(x.get("position")) if int(x.get("position")) > 0 else None,
         attrs="ranking",
+        compact_attrs=lambda x: {"position": x.get("position"), "cohort_size": len(x.get("ranking")), ATTR_RANKING: x.get("ranking")},
         icon="mdi:bulletin-board",
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
@@ -94,6 +102,7 @@ SENSORS: list[DuolingoEntityDescription | Callable] = [
         name="Friends",
         state=lambda x: len(x.get("following")),
         attrs=lambda x: {str(i + 1): f for i, f in enumerate(x.get("following"))},
+        compact_attrs=lambda x: {"count": len(x.get("following")), ATTR_FOLLOWING: x.get("following")},
         icon="mdi:bulletin-board",
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
@@ -151,6 +160,41 @@ SENSORS: list[DuolingoEntityDescription | Callable] = [
         icon="mdi:calendar-multiselect-outline",
         entity_category=EntityCategory.DIAGNOSTIC,
     ),
+    DuolingoEntityDescription(
+        key="xp_history",
+        name="XP 30 Days",
+        state="total_30_days",
+        attrs=lambda x: {"courses": x.get("courses_30_days")},
+        icon="mdi:calendar-month",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        unit="XP",
+    ),
+    DuolingoEntityDescription(
+        key="xp_history",
+        name="XP Month",
+        state="month_to_date",
+        attrs=lambda x: {"courses": x.get("courses_month_to_date")},
+        icon="mdi:calendar-month-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        unit="XP",
+    ),
+    DuolingoEntityDescription(
+        key="xp_history",
+        name="XP 7 Day Average",
+        state="average_7_days",
+        icon="mdi:chart-line",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        unit="XP",
+    ),
+    DuolingoEntityDescription(
+        key="xp_history",
+        name="Best Day XP",
+        state=lambda x: x.get("best_day").get("xp"),
+        attrs=lambda x: {"date": x.get("best_day").get("date")},
+        icon="mdi:trophy",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        unit="XP",
+    ),
     lambda userCoordinator: generate_languages(userCoordinator),
     lambda userCoordinator: generate_language_scores(userCoordinator),
     lambda userCoordinator: generate_friend_streaks(userCoordinator),
@@ -248,6 +292,49 @@ def generate_friend_streaks(userCoordinator) -> list[DuolingoEntityDescription]:
         )
     return generated
 
+LEADERBOARD_SENSORS: list[DuolingoEntityDescription] = [
+    DuolingoEntityDescription(
+        key="user_data",
+        name="Today",
+        state=lambda x: x.get("xp") if x.get("xp", -1) > 0 else 0,
+        icon="mdi:sort-descending",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        unit="place",
+    ),
+    DuolingoEntityDescription(
+        key="user_data",
+        name="Week",
+        state=lambda x: x.get("week_xp") if x.get("week_xp", -1) > 0 else 0,
+        icon="mdi:sort-descending",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        unit="place",
+    ),
+]
+
+def build_descriptions(userCoordinator) -> list[DuolingoEntityDescription]:
+    """Return the static and generated sensor descriptions of one user."""
+    descriptions = []
+    for sensor in SENSORS:
+        if type(sensor) == functionType:
+            descriptions.extend(sensor(userCoordinator))
+        else:
+            descriptions.append(sensor)
+    return descriptions
+
+def build_generated_descriptions(userCoordinator) -> list[DuolingoEntityDescription]:
+    """Return only the descriptions generated from the user's courses and friend streaks."""
+    descriptions = []
+    for sensor in SENSORS:
+        if type(sensor) == functionType:
+            descriptions.extend(sensor(userCoordinator))
+    return descriptions
+
+def generated_ids(userCoordinator) -> tuple:
+    """Cheap signature of everything the generated sensors depend on."""
+    courses = tuple((course.get("id"), course.get("name"), course.get("from")) for course in userCoordinator.get("user_data", {}).get("courses", []))
+    friend_streaks = tuple((friend_streak.get("id"), friend_streak.get("friend", {}).get("name")) for friend_streak in userCoordinator.get("friend_streaks_data", {}).get("confirmed", []))
+    return courses, friend_streaks
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -256,43 +343,64 @@ async def async_setup_entry(
     coordinator: DuolingoDataCoordinator = hass.data[DOMAIN][config_entry.entry_id]
     usernames = config_entry.data[CONF_USERNAME]
     jwt = config_entry.data[CONF_JWT]
+    compact = config_entry.data.get(CONF_COMPACT_ATTRIBUTES, False)
 
     sensor_per_username = []
+    generated: dict[str, dict[str, DuolingoSensor]] = {}
+    signatures: dict[str, tuple] = {}
     for username in usernames:
+        userCoordinator = coordinator.data[username] if coordinator.data.get(username) else {}
         for sensor in SENSORS:
-            if type(sensor) == functionType:
-                userCoordinator = coordinator.data[username] if coordinator.data.get(username) else {}
-                for generatedSensor in sensor(userCoordinator):
-                    sensor_per_username.append(DuolingoSensor(coordinator, jwt, username, generatedSensor))
-            else:
-                sensor_per_username.append(DuolingoSensor(coordinator, jwt, username, sensor))
-    sensor_per_username.append(DuolingoLeaderboardSensor(
-        coordinator,
-        jwt,
-        usernames,
-        DuolingoEntityDescription(
-                key="user_data",
-                name="Today",
-                state=lambda x: x.get("xp") if x.get("xp", -1) > 0 else 0,
-                icon="mdi:sort-descending",
-                entity_category=EntityCategory.DIAGNOSTIC,
-                unit="place",
-            )
-        ))
-    sensor_per_username.append(DuolingoLeaderboardSensor(
-        coordinator,
-        jwt,
-        usernames,
-        DuolingoEntityDescription(
-                key="user_data",
-                name="Week",
-                state=lambda x: x.get("week_xp") if x.get("week_xp", -1) > 0 else 0,
-                icon="mdi:sort-descending",
-                entity_category=EntityCategory.DIAGNOSTIC,
-                unit="place",
-            )
-        ))
+            if type(sensor) != functionType:
+                sensor_per_username.append(sensor_class(sensor, compact)(coordinator, jwt, username, sensor))
+                coordinator.async_mark_known(username, KEY_CATEGORIES[sensor.key])
+        generated[username] = {
+            description.name: sensor_class(description, compact)(coordinator, jwt, username, description)
+            for description in build_generated_descriptions(userCoordinator)
+        }
+        sensor_per_username.extend(generated[username].values())
+        for sensor in generated[username].values():
+            coordinator.async_mark_known(username, KEY_CATEGORIES[sensor._description.key])
+        if userCoordinator:
+            signatures[username] = generated_ids(userCoordinator)
+    for description in LEADERBOARD_SENSORS:
+        sensor_per_username.append(DuolingoLeaderboardSensor(coordinator, jwt, usernames, description))
+    for username in usernames:
+        coordinator.async_mark_known(username, CATEGORY_USER)
+        coordinator.async_mark_known(username, CATEGORY_LEADERBOARD)
     async_add_entities(
         sensor_per_username
     )
 
+    @callback
+    def async_sync_generated_sensors() -> None:
+        """Add and retire generated sensors when a user's courses or friend streaks change."""
+        entity_registry = er.async_get(hass)
+        added = []
+        for username in usernames:
+            userCoordinator = (coordinator.data or {}).get(username)
+            if not userCoordinator:
+                # Keep the existing sensors while the user's data is unavailable
+                continue
+            signature = generated_ids(userCoordinator)
+            if signatures.get(username) == signature:
+                continue
+            signatures[username] = signature
+
+            current = generated[username]
+            wanted = {description.name: description for description in build_generated_descriptions(userCoordinator)}
+            for name in [name for name in current if name not in wanted]:
+                sensor = current.pop(name)
+                if sensor.registry_entry is not None:
+                    entity_registry.async_remove(sensor.entity_id)
+                else:
+                    hass.async_create_task(sensor.async_remove(force_remove=True))
+            for name, description in wanted.items():
+                if name not in current:
+                    current[name] = sensor_class(description, compact)(coordinator, jwt, username, description)
+                    coordinator.async_mark_known(username, KEY_CATEGORIES[description.key])
+                    added.append(current[name])
+        if added:
+            async_add_entities(added)
+
+    config_entry.async_on_unload(coordinator.async_add_listener(async_sync_generated_sensors))
@@ -0,0 +1,90 @@
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import (
+    DOMAIN,
+    SERVICE_PROFILE,
+    SERVICE_REFRESH,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_CYCLES,
+    ATTR_ENTITIES,
+    ATTR_TOP,
+    ATTR_USERNAMES,
+    ATTR_CATEGORIES,
+    CATEGORY_KEYS,
+    )
+from .coordinator import DuolingoDataCoordinator
+from .profiler import RefreshProfiler
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_CYCLES, default=1): vol.All(vol.Coerce(int), vol.Range(min=1, max=20)),
+    vol.Optional(ATTR_ENTITIES, default=False): cv.boolean,
+    vol.Optional(ATTR_TOP, default=15): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+})
+
+REFRESH_SCHEMA = vol.Schema({
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_USERNAMES): vol.All(cv.ensure_list, [cv.string]),
+    vol.Optional(ATTR_CATEGORIES, default=list(CATEGORY_KEYS)): vol.All(cv.ensure_list, [vol.In(list(CATEGORY_KEYS))]),
+})
+
+
+def _get_coordinators(hass: HomeAssistant, call: ServiceCall) -> list[DuolingoDataCoordinator]:
+    coordinators = {
+        entry_id: coordinator
+        for entry_id, coordinator in hass.data.get(DOMAIN, {}).items()
+        if isinstance(coordinator, DuolingoDataCoordinator)
+    }
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is None:
+        return list(coordinators.values())
+    if entry_id not in coordinators:
+        raise ServiceValidationError(f"Duolingo config entry {entry_id} is not loaded")
+    return [coordinators[entry_id]]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the Duolingo services once for all config entries."""
+    if hass.services.has_service(DOMAIN, SERVICE_PROFILE):
+        return
+
+    async def async_profile(call: ServiceCall) -> None:
+        coordinators = _get_coordinators(hass, call)
+        # cProfile records the whole process, one profiler covers every entry
+        profiler = RefreshProfiler(call.data[ATTR_CYCLES], call.data[ATTR_ENTITIES], call.data[ATTR_TOP])
+        await hass.async_add_executor_job(profiler.start)
+        for coordinator in coordinators:
+            await coordinator.async_start_profiling(profiler)
+        if not coordinators:
+            await hass.async_add_executor_job(profiler.stop)
+
+    hass.services.async_register(DOMAIN, SERVICE_PROFILE, async_profile, schema=PROFILE_SCHEMA)
+
+    async def async_refresh(call: ServiceCall) -> None:
+        coordinators = _get_coordinators(hass, call)
+        usernames = call.data.get(ATTR_USERNAMES)
+        if usernames is not None:
+            unknown = set(usernames).difference(*(coordinator.usernames for coordinator in coordinators))
+            if unknown:
+                raise ServiceValidationError(f"Duolingo users {', '.join(sorted(unknown))} are not tracked")
+        categories = set(call.data[ATTR_CATEGORIES])
+        failed = []
+        for coordinator in coordinators:
+            selected = [username for username in coordinator.usernames if usernames is None or username in usernames]
+            failed.extend(await coordinator.async_refresh_categories(selected, categories))
+        if failed:
+            raise HomeAssistantError(f"Failed to refresh Duolingo users {', '.join(failed)}")
+
+    hass.services.async_register(DOMAIN, SERVICE_REFRESH, async_refresh, schema=REFRESH_SCHEMA)
+
+
+@callback
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the Duolingo services when the last config entry is unloaded."""
+    hass.services.async_remove(DOMAIN, SERVICE_PROFILE)
+    hass.services.async_remove(DOMAIN, SERVICE_REFRESH)
@@ -0,0 +1,70 @@
+from datetime import date
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util, slugify
+
+try:
+    from homeassistant.components.recorder.models import StatisticMeanType
+except ImportError:
+    StatisticMeanType = None
+
+from .const import DOMAIN
+from .history import DailyXp, XpHistory
+
+import logging
+_LOGGER = logging.getLogger(__name__)
+
+
+def statistic_id(username: str, name: str) -> str:
+    return f"{DOMAIN}:{slugify(f'{username}_{name}')}"
+
+
+def _metadata(statistic: str, name: str) -> StatisticMetaData:
+    metadata = StatisticMetaData(
+        has_mean=False,
+        has_sum=True,
+        name=name,
+        source=DOMAIN,
+        statistic_id=statistic,
+        unit_of_measurement="XP",
+    )
+    if StatisticMeanType is not None:
+        metadata["mean_type"] = StatisticMeanType.NONE
+    return metadata
+
+
+def _import(hass: HomeAssistant, ring: DailyXp, statistic: str, name: str) -> int:
+    """Import the days of ``ring`` changed since the last import, one row per day at local midnight."""
+    if ring.dirty_from is None or ring.last_day is None:
+        return 0
+    statistics = [
+        StatisticData(
+            start=dt_util.start_of_local_day(date.fromordinal(day)),
+            state=ring.value(day),
+            sum=ring.running_total(day),
+        )
+        for day in range(max(ring.dirty_from, ring.oldest()), ring.last_day + 1)
+    ]
+    async_add_external_statistics(hass, _metadata(statistic, name), statistics)
+    ring.clean()
+    return len(statistics)
+
+
+@callback
+def async_import_xp_statistics(hass: HomeAssistant, history: XpHistory) -> int:
+    """
+    Write the daily XP of every user, in total and per course, to the long-term statistics.
+    Everything the history holds is written the first time, afterwards only new or changed days. Returns the rows written.
+    """
+    if "recorder" not in hass.config.components:
+        return 0
+    rows = 0
+    for username, user in history.users.items():
+        rows += _import(hass, user.daily, statistic_id(username, "daily_xp"), f"{username} Daily XP")
+        for course_id, ring in user.courses.items():
+            rows += _import(hass, ring, statistic_id(username, f"{course_id}_xp"), f"{username} {user.course_names.get(course_id, course_id)} XP")
+    if rows:
+        _LOGGER.debug("Imported %s daily XP statistics rows", rows)
+    return rows
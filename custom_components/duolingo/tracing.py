@@ -0,0 +1,116 @@
+import re, threading, time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable
+
+_local = threading.local()
+
+_ID_RE = re.compile(r'(?<=/)\d+(?=/|$)')
+
+
+class Span:
+    """One timed step of a refresh cycle."""
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: dict | None = None):
+        self.name = name
+        self.attrs = attrs or {}
+        self.start = time.perf_counter()
+        self.end = None
+        self.children = []
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+
+    def extend_to(self, end: float):
+        if self.end is None or end > self.end:
+            self.end = end
+
+    @property
+    def duration_ms(self) -> float | None:
+        if self.end is None:
+            return None
+        return round((self.end - self.start) * 1000, 3)
+
+    def as_dict(self, origin: float | None = None) -> dict[str, Any]:
+        if origin is None:
+            origin = self.start
+        return {
+            "name": self.name,
+            "offset_ms": round((self.start - origin) * 1000, 3),
+            "duration_ms": self.duration_ms,
+            **({"attrs": dict(self.attrs)} if self.attrs else {}),
+            **({"children": [child.as_dict(origin) for child in list(self.children)]} if self.children else {}),
+        }
+
+
+def current_span() -> Span | None:
+    return getattr(_local, "span", None)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """
+    Open a child span of the span active in this thread. Does nothing when no cycle is being traced.
+    """
+    parent = current_span()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, attrs)
+    parent.children.append(child)
+    _local.span = child
+    try:
+        yield child
+    except Exception as err:
+        child.attrs["error"] = type(err).__name__
+        raise
+    finally:
+        child.finish()
+        _local.span = parent
+
+
+def run_in_span(parent: Span | None, name: str, func: Callable, *args, **attrs):
+    """
+    Run ``func`` as a child span of ``parent``. Used to carry a cycle into executor threads.
+    """
+    previous = current_span()
+    _local.span = parent
+    try:
+        with span(name, **attrs):
+            return func(*args)
+    finally:
+        _local.span = previous
+
+
+def endpoint_template(url: str, username: str | None = None) -> str:
+    """
+    Strip query, usernames and numeric ids from ``url`` so it can be kept in a trace.
+    """
+    path = url.split("?", 1)[0].split("://", 1)[-1]
+    if username:
+        path = re.sub(re.escape(username), "{username}", path, flags=re.IGNORECASE)
+    return _ID_RE.sub("{id}", path)
+
+
+class RefreshTracer:
+    """Keeps the span trees of the last ``max_cycles`` refresh cycles."""
+
+    def __init__(self, max_cycles: int = 10):
+        self._cycles: deque[tuple[float, Span]] = deque(maxlen=max_cycles)
+
+    def start_cycle(self, name: str, **attrs) -> Span:
+        root = Span(name, attrs)
+        self._cycles.append((time.time(), root))
+        return root
+
+    @property
+    def last(self) -> Span | None:
+        return self._cycles[-1][1] if self._cycles else None
+
+    def as_list(self) -> list[dict[str, Any]]:
+        return [
+            {"started": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(started)), **root.as_dict()}
+            for started, root in list(self._cycles)
+        ]
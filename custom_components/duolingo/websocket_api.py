@@ -0,0 +1,121 @@
+from collections.abc import Callable
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    ATTR_CONFIG_ENTRY_ID,
+    CATEGORY_LEADERBOARD,
+    CATEGORY_FRIENDS,
+    CATEGORY_FRIEND_STREAKS,
+    CATEGORY_KEYS,
+    )
+from .coordinator import DuolingoDataCoordinator
+
+# View -> (category it reads, key of a row, rows of the client of that category)
+VIEWS: dict[str, tuple[str, str, Callable[[Any], list[dict]]]] = {
+    "leaderboard": (
+        CATEGORY_LEADERBOARD,
+        "user_id",
+        lambda leaderboard: [{"position": int(position), **row} for position, row in leaderboard.ranking.items()],
+    ),
+    "friends": (CATEGORY_FRIENDS, "user_id", lambda friends: friends.following),
+    "friend_streaks": (CATEGORY_FRIEND_STREAKS, "id", lambda friend_streaks: friend_streaks.confirmed),
+}
+
+VIEW_SCHEMA = {
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): str,
+    vol.Required("username"): str,
+    vol.Required("view"): vol.In(list(VIEWS)),
+}
+
+
+def _get_coordinator(hass: HomeAssistant, msg: dict) -> DuolingoDataCoordinator | None:
+    for entry_id, coordinator in hass.data.get(DOMAIN, {}).items():
+        if not isinstance(coordinator, DuolingoDataCoordinator):
+            continue
+        if msg.get(ATTR_CONFIG_ENTRY_ID) not in (None, entry_id):
+            continue
+        if msg["username"] in coordinator.usernames:
+            return coordinator
+    return None
+
+
+def _rows(coordinator: DuolingoDataCoordinator, username: str, view: str) -> dict[Any, dict]:
+    lingo = (coordinator.data or {}).get(username)
+    category, key, build = VIEWS[view]
+    # No client yet: the category was never fetched
+    client = lingo.get(CATEGORY_KEYS[category]) if lingo is not None else None
+    if client is None:
+        return {}
+    return {row[key]: row for row in build(client) if key in row}
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/view", **VIEW_SCHEMA})
+@callback
+def websocket_view(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """Return every row of a leaderboard, friends or friend streaks view of a user."""
+    coordinator = _get_coordinator(hass, msg)
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Duolingo user {msg['username']} is not tracked")
+        return
+    connection.send_result(msg["id"], {"rows": list(_rows(coordinator, msg["username"], msg["view"]).values())})
+
+
+@websocket_api.websocket_command({vol.Required("type"): f"{DOMAIN}/subscribe", **VIEW_SCHEMA})
+@callback
+def websocket_subscribe(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict) -> None:
+    """
+    Send every row of a view once, then after each coordinator update only the rows which were added or changed
+    (``changed``) and the keys of the removed ones (``removed``).
+    """
+    coordinator = _get_coordinator(hass, msg)
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Duolingo user {msg['username']} is not tracked")
+        return
+    username, view = msg["username"], msg["view"]
+    sent = _rows(coordinator, username, view)
+
+    @callback
+    def forward_changes() -> None:
+        nonlocal sent
+        rows = _rows(coordinator, username, view)
+        changed = [row for key, row in rows.items() if sent.get(key) != row]
+        removed = [key for key in sent if key not in rows]
+        sent = rows
+        if changed or removed:
+            connection.send_message(websocket_api.event_message(msg["id"], {"changed": changed, "removed": removed}))
+
+    remove_listener = coordinator.async_add_listener(forward_changes, username)
+    # A subscribed view keeps its category fetched, even when all its entities are disabled
+    remove_consumer = coordinator.async_add_consumer(username, VIEWS[view][0])
+
+    @callback
+    def unsubscribe() -> None:
+        remove_listener()
+        remove_consumer()
+        remove_shutdown()
+
+    @callback
+    def entry_unloaded() -> None:
+        # The coordinator goes away with its entry (also on a reload), end the subscription instead of going silent
+        if connection.subscriptions.pop(msg["id"], None) is None:
+            return
+        remove_listener()
+        remove_consumer()
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, f"Duolingo config entry of {username} was unloaded, subscribe again")
+
+    remove_shutdown = coordinator.async_on_shutdown(entry_unloaded)
+    connection.subscriptions[msg["id"]] = unsubscribe
+    connection.send_result(msg["id"])
+    connection.send_message(websocket_api.event_message(msg["id"], {"rows": list(sent.values())}))
+
+
+@callback
+def async_setup_websocket_api(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, websocket_view)
+    websocket_api.async_register_command(hass, websocket_subscribe)
@@ -0,0 +1,51 @@
+"""The shared cache must not answer a refresh the user asked for with the responses of the poll before it."""
+import json
+from collections import Counter
+from urllib.parse import urlsplit
+
+import pytest
+import requests
+
+from benchmarks._loader import load
+
+cache = load("cache")
+const = load("const")
+duolingo = load("duolingo")
+
+FRIENDS = "friends-prod.duolingo.com/users/1/profile"
+
+
+@pytest.fixture
+def sent(monkeypatch) -> Counter:
+    """Requests sent by every client, by host and path. Each one is answered with an empty 200 response."""
+    sent = Counter()
+
+    class CountingSession(requests.Session):
+        def send(self, request, **kwargs):
+            url = urlsplit(request.url)
+            sent[url.netloc + url.path] += 1
+            response = requests.Response()
+            response.status_code = 200
+            response.url = request.url
+            response._content = json.dumps({"followers": {"users": []}, "following": {"users": []}}).encode()
+            return response
+
+    monkeypatch.setattr(requests, "Session", CountingSession)
+    return sent
+
+
+def test_refresh_right_after_a_poll_sends_a_request(sent):
+    client = duolingo.Duolingo("alice", jwt="header.e30.signature", user_id=1, cache=cache.SharedCache())
+    categories = {const.CATEGORY_FRIENDS}
+
+    client.update(categories)
+    client.update(categories)
+    assert sent[FRIENDS] == 1
+
+    client.update(categories, force=True)
+    assert sent[FRIENDS] == 2
+
+    # The response of the refresh replaced the cached one, polls are answered from it again
+    client.update(categories)
+    assert sent[FRIENDS] == 2
+
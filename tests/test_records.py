@@ -0,0 +1,61 @@
+"""Records must read like the dicts they replaced. Needs no Home Assistant installation."""
+import pytest
+
+from benchmarks._loader import load
+
+records = load("records")
+duolingo = load("duolingo")
+
+
+def _friend_streak() -> records.FriendStreak:
+    return records.FriendStreak(
+        name="Alice", picture="//simg-ssl.duolingo.com/ssr-avatars/1/SSR-a", user_id=1, length=12,
+        start="2026-10-01", end="2026-10-12", extended=True, id="match-1",
+        friend=records.StreakFriend(name="Bob", picture="//simg-ssl.duolingo.com/ssr-avatars/2/SSR-b", user_id=2, match_id="match-1"),
+    )
+
+
+RECORDS = [
+    records.Friend(username="bob", display_name="Bob", picture="https://simg-ssl.duolingo.com/ssr-avatars/2/SSR-b", subscription=False, xp=1200, user_id=2),
+    records.RankingRow(display_name="Carol", score=340, avatar="//simg-ssl.duolingo.com/ssr-avatars/3/SSR-c", has_plus=True, extended_today=False, user_id=3),
+    records.Course(name="Spanish", language="es", from_="en", xp=50000, id="DUOLINGO_ES_EN", score=None),
+    _friend_streak(),
+]
+
+
+def test_records_read_like_dicts():
+    course = RECORDS[2]
+
+    assert course["from"] == "en"
+    assert course.get("score") is None
+    assert dict(course) == course.as_dict()
+    assert course == records.Course(name="Spanish", language="es", from_="en", xp=50000, id="DUOLINGO_ES_EN", score=None)
+    assert _friend_streak() == RECORDS[3]
+    with pytest.raises(AttributeError):
+        course.xp = 0
+
+
+@pytest.mark.parametrize("record", RECORDS, ids=lambda record: type(record).__name__)
+def test_as_dict_matches_the_mapping(record):
+    encoded = record.as_dict()
+
+    assert "picture" not in encoded and "from_" not in encoded
+    assert encoded == {key: value for key, value in record.items()}
+
+
+def test_friend_streaks_skip_matches_missing_a_user():
+    client = duolingo.DuolingoFriendStreaksData("alice", jwt="header.e30.signature", user_id=1)
+    alice = {"userId": 1, "name": "Alice", "picture": "//simg-ssl.duolingo.com/ssr-avatars/1/SSR-a"}
+    bob = {"userId": 2, "name": "Bob", "picture": "//simg-ssl.duolingo.com/ssr-avatars/2/SSR-b"}
+    streak = {"streakLength": 12, "startDate": "2026-10-01", "endDate": "2026-10-12", "extended": True}
+    data = {
+        "friend_streak": {"friendsStreak": {"confirmedMatches": [
+            {"matchId": "match-1", "usersInMatch": [alice, bob]},
+            # Rows the dicts used to keep half filled: no friend, or only the friend
+            {"matchId": "match-2", "usersInMatch": [alice]},
+            {"matchId": "match-3", "usersInMatch": [bob]},
+        ]}},
+        "matches": {"friendsStreak": [{"matchId": match_id, "streaks": [streak]} for match_id in ("match-1", "match-2", "match-3")]},
+    }
+
+    assert client._streak_records(data) == [_friend_streak()]
@@ -0,0 +1,27 @@
+"""Records must leave the integration through Home Assistant's JSON encoder with the keys of the dicts they replaced."""
+import json
+
+import pytest
+
+json_helpers = pytest.importorskip("homeassistant.helpers.json")
+
+from test_records import RECORDS
+
+
+@pytest.mark.parametrize("record", RECORDS, ids=lambda record: type(record).__name__)
+def test_json_bytes_uses_the_dict_keys(record):
+    assert json.loads(json_helpers.json_bytes(record)) == record.as_dict()
+    assert json.loads(json_helpers.json_bytes({"items": [record]})) == {"items": [record.as_dict()]}
+
+
+def test_json_bytes_derives_avatars_and_renames_from():
+    encoded = json.loads(json_helpers.json_bytes([RECORDS[0], RECORDS[2], RECORDS[3]]))
+
+    assert encoded[0]["avatar"] == "https://simg-ssl.duolingo.com/ssr-avatars/2/SSR-b/large"
+    assert "picture" not in encoded[0]
+    assert encoded[1]["from"] == "en"
+    assert "from_" not in encoded[1]
+    assert encoded[2]["avatar"] == "//simg-ssl.duolingo.com/ssr-avatars/1/SSR-a/large"
+    assert encoded[2]["friend"] == {
+        "name": "Bob", "avatar": "//simg-ssl.duolingo.com/ssr-avatars/2/SSR-b/large", "user_id": 2, "match_id": "match-1",
+    }